@@ -2,6 +2,7 @@ __import__('pkg_resources').declare_namespace(__name__)
 
 import connectivity
 import core
+import fileio
 import matrix
 import orientation
 import path
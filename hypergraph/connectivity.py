@@ -7,28 +7,85 @@ Hypergraph - connectivity properties.
 @license: LGPL-3
 """
 
-from itertools import combinations
+import numpy
 
-from .matrix import laplacian_matrix, laplacian_eigenvalues
+from .core import Hypergraph, Graph
+from .matrix import vertex_order, laplacian_matrix, \
+    smallest_laplacian_eigenpairs, DENSE_LIMIT
 
 
 def connected(H):
     """\
-    Return whether an undirected hypergraph is connected using the eigenvalues
-    of its Laplacian matrix.
+    Return whether an undirected hypergraph is connected, by traversal.
 
     @param H: The input undirected hypergraph.
     @type H: L{Hypergraph}
     @return: Connectivity.
     @rtype: C{bool}
     @raise ValueError: The hypergraph is not undirected.
-    @todo: Are there faster ways to determine connectedness for certain cases?
     """
     try:
         assert not H.directed
     except AssertionError:
         raise ValueError('function only applies to undirected hypergraphs')
-    return laplacian_eigenvalues(laplacian_matrix(H))[1] > 1e-8
+    return len(connected_components(H)) <= 1
+
+
+def connected_components(H):
+    """\
+    Return the connected components of a hypergraph (weakly connected
+    components, if it is directed), largest first. Runs in time linear in the
+    number of vertices and the total size of the edges.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @return: The vertex set and edge set of each component.
+    @rtype: C{list} of C{tuple} of (C{set}, C{set})
+    """
+    components = []
+    marked = set()
+    for start in H.vertices:
+        if start in marked:
+            continue
+        marked.add(start)
+        V, E = set([start]), set()
+        stack = [start]
+        while stack:
+            v = stack.pop()
+            incident = H.incident(v)
+            if H.directed:
+                incident |= H.incident(v, forward=False)
+            for edge in incident - E:
+                E.add(edge)
+                for w in edge:
+                    if not w in marked:
+                        marked.add(w)
+                        V.add(w)
+                        stack.append(w)
+        components.append((V, E))
+    components.sort(key=lambda component: len(component[0]), reverse=True)
+    return components
+
+
+def largest_component(H):
+    """\
+    Return the subhypergraph induced by the connected component of a hypergraph
+    with the most vertices.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @return: The largest connected component.
+    @rtype: L{Hypergraph}
+    """
+    components = connected_components(H)
+    C = (Graph if isinstance(H, Graph) else Hypergraph)(directed=H.directed)
+    if components:
+        V, E = components[0]
+        for v in V:
+            C.add_vertex(v)
+        for edge in E:
+            C.add_edge(edge, weight=H.weights[edge])
+    return C
 
 
 def edge_cut(H, X):
@@ -43,18 +100,190 @@ def edge_cut(H, X):
     @rtype: C{set}
     @raise ValueError: X is not a subset of the vertices of H.
     """
-    try:
-        assert X.issubset(H.vertices)
-    except AssertionError:
-        raise ValueError('set is not a subset of the hypergraph vertices')
-    Y = H.vertices - X
-    EX = set()
-    for edge in H.edges:
-        for u, v in combinations(edge, 2):
-            if u in X and not u in Y and v in Y and not v in X:
-                EX.add(edge)
-                break
-    return EX
+    return EdgeCut(H, X).edges
+
+
+class EdgeCut(object):
+    """\
+    Edge cut of a vertex subset X of a hypergraph, maintained incrementally. An
+    edge is in the cut if it contains some, but not all, of its vertices in X.
+    The number of vertices of each edge in X is tracked, so that moving a
+    vertex into or out of X updates the cut in time proportional to its degree.
+    """
+    def __init__(self, H, X=()):
+        """\
+        Constructor.
+
+        @param H: The hypergraph.
+        @type H: L{Hypergraph}
+        @param X: The initial vertex subset.
+        @type X: C{set}
+        @raise ValueError: X is not a subset of the vertices of H.
+        """
+        self._vertices = vertex_order(H)
+        self._index = dict(H.vertex_index)
+        self._edges = list(H.edges)
+        self._sizes = [len(edge) for edge in self._edges]
+        self._incident = [[] for v in self._vertices]
+        for e, edge in enumerate(self._edges):
+            for v in edge:
+                self._incident[self._index[v]].append(e)
+        self._offsets = numpy.cumsum([0] + self._sizes)
+        self._ids = numpy.array([self._index[v] for edge in self._edges \
+            for v in edge], dtype=int)
+        self._count = [0] * len(self._edges)
+        self._members = set()
+        self._cut = set()
+        try:
+            for v in X:
+                self.add(v)
+        except ValueError:
+            raise ValueError('set is not a subset of the hypergraph vertices')
+
+    def __len__(self):
+        """\
+        Size of the edge cut.
+
+        @rtype: C{int}
+        """
+        return len(self._cut)
+
+    @property
+    def size(self):
+        """\
+        Number of vertices in X.
+
+        @rtype: C{int}
+        """
+        return len(self._members)
+
+    @property
+    def members(self):
+        """\
+        The vertex subset X.
+
+        @rtype: C{set}
+        """
+        return set([self._vertices[i] for i in self._members])
+
+    @property
+    def edges(self):
+        """\
+        The edge cut of X.
+
+        @rtype: C{set} of L{Edge}
+        """
+        return set([self._edges[e] for e in self._cut])
+
+    def add(self, v):
+        """\
+        Move a vertex into X.
+
+        @param v: The vertex.
+        @type v: C{object}
+        @raise ValueError: The vertex is not in the hypergraph.
+        """
+        try:
+            i = self._index[v]
+        except KeyError:
+            raise ValueError('hypergraph has no vertex %s' % (v,))
+        if not i in self._members:
+            self._add(i)
+
+    def remove(self, v):
+        """\
+        Move a vertex out of X.
+
+        @param v: The vertex.
+        @type v: C{object}
+        @raise ValueError: The vertex is not in the hypergraph.
+        """
+        try:
+            i = self._index[v]
+        except KeyError:
+            raise ValueError('hypergraph has no vertex %s' % (v,))
+        if i in self._members:
+            self._remove(i)
+
+    def incident(self, v):
+        """\
+        Return the ids of the edges containing a vertex. Edge ids are positions
+        in the edge list of the hypergraph at construction, and range from 0 to
+        the number of edges.
+
+        @param v: The vertex.
+        @type v: C{object}
+        @return: The ids of the incident edges.
+        @rtype: C{list} of C{int}
+        @raise ValueError: The vertex is not in the hypergraph.
+        """
+        try:
+            return self._incident[self._index[v]]
+        except KeyError:
+            raise ValueError('hypergraph has no vertex %s' % (v,))
+
+    def count(self, e):
+        """\
+        Return the number of vertices of an edge in X.
+
+        @param e: The edge id (see L{incident}).
+        @type e: C{int}
+        @return: The number of vertices of the edge in X.
+        @rtype: C{int}
+        """
+        return self._count[e]
+
+    def _add(self, i):
+        """\
+        Move a vertex into X by its position in L{vertex_order}.
+        """
+        self._members.add(i)
+        for e in self._incident[i]:
+            self._count[e] += 1
+            if self._count[e] == self._sizes[e]:
+                self._cut.discard(e)
+            elif self._count[e] == 1:
+                self._cut.add(e)
+
+    def _remove(self, i):
+        """\
+        Move a vertex out of X by its position in L{vertex_order}.
+        """
+        self._members.remove(i)
+        for e in self._incident[i]:
+            self._count[e] -= 1
+            if self._count[e] == 0:
+                self._cut.discard(e)
+            elif self._count[e] == self._sizes[e] - 1:
+                self._cut.add(e)
+
+    def sizes(self, sets):
+        """\
+        Return the edge cut sizes of a batch of vertex subsets, evaluated
+        together with sparse matrix operations (independently of X), in time
+        and memory proportional to the number of incidences of their vertices.
+
+        @param sets: The vertex subsets.
+        @type sets: C{list} of C{set}
+        @return: The size of the edge cut of each subset.
+        @rtype: C{numpy.ndarray}
+        @raise ValueError: A set is not a subset of the hypergraph vertices.
+        """
+        import scipy.sparse
+        rows, cols = [], []
+        try:
+            for j, X in enumerate(sets):
+                rows.extend([self._index[v] for v in X])
+                cols.extend([j] * len(X))
+        except KeyError:
+            raise ValueError('set is not a subset of the hypergraph vertices')
+        M = scipy.sparse.csr_matrix((numpy.ones(len(rows), dtype=int),
+            (rows, cols)), (len(self._vertices), len(sets)))
+        B = scipy.sparse.csr_matrix((numpy.ones(len(self._ids), dtype=int),
+            self._ids, self._offsets), (len(self._edges), len(self._vertices)))
+        counts = B.dot(M).tocoo()
+        cut = counts.data < numpy.array(self._sizes, dtype=int)[counts.row]
+        return numpy.bincount(counts.col[cut], minlength=len(sets))
 
 
 def isoperimetric_number(H):
@@ -65,16 +294,120 @@ def isoperimetric_number(H):
           Hypergraphs," Applied Mathematics Letters, vol. 22, no. 6, pp.
           916-921, 2009.
 
-    @param H: The hypergraph.
+    The exact value is found by branch-and-bound over vertex subsets, with edge
+    cuts updated incrementally. The search starts from the Fiedler sweep cut of
+    L{approximate_isoperimetric_number}. It prunes any branch whose partial cut
+    already rules out an improvement, and it stops once the incumbent meets the
+    spectral lower bound. The search keeps its own stack, so its depth is not
+    bounded by the recursion limit.
+
+    @param H: The undirected hypergraph.
     @type H: L{Hypergraph}
     @return: The isoperimetric number of H.
     @rtype: C{float}
-    @todo: Can edge cut cardinality be computed faster in some cases?
+    @raise ValueError: The hypergraph is not undirected.
+    """
+    try:
+        assert not H.directed
+    except AssertionError:
+        raise ValueError('function only applies to undirected hypergraphs')
+    n = len(H.vertices)
+    if n < 2:
+        return float('inf')
+    lower, order, best = _sweep_cut(H)
+    limit = n // 2
+    cut = EdgeCut(H)
+    outside = [0] * len(H.edges)
+    # depth-first search over the vertices in Fiedler order; in each frame
+    # (j, definite, phase), definite counts the edges with vertices both in X
+    # and outside X among the first j vertices, and phase is 0 before the
+    # branch with vertex j in X, 1 before the branch with it outside X, and 2
+    # once both branches are done
+    stack = [(0, 0, 0)]
+    while stack and best > lower + 1e-9:
+        j, definite, phase = stack.pop()
+        if phase == 0:
+            if j == n or cut.size == limit:
+                continue
+            largest = min(limit, cut.size + n - j)
+            if definite >= (best - 1e-9) * largest:
+                continue
+            v = order[j]
+            cut.add(v)
+            if len(cut) < best * cut.size:
+                best = float(len(cut)) / cut.size
+            stack.append((j, definite, 1))
+            stack.append((j + 1, definite + sum([1 for e in cut.incident(v) \
+                if cut.count(e) == 1 and outside[e]]), 0))
+        elif phase == 1:
+            v = order[j]
+            cut.remove(v)
+            for e in cut.incident(v):
+                outside[e] += 1
+            stack.append((j, definite, 2))
+            stack.append((j + 1, definite + sum([1 for e in cut.incident(v) \
+                if outside[e] == 1 and cut.count(e)]), 0))
+        else:
+            for e in cut.incident(order[j]):
+                outside[e] -= 1
+    return best
+
+
+def approximate_isoperimetric_number(H):
+    """\
+    Approximate the isoperimetric number of a hypergraph by the best sweep cut
+    of the Fiedler vector of its (unweighted) Laplacian. The gap to the
+    spectral lower bound is reported along with the approximation.
+
+    @param H: The undirected hypergraph.
+    @type H: L{Hypergraph}
+    @return: Upper bound on the isoperimetric number of H, and its maximum
+             distance from the true value.
+    @rtype: C{float}, C{float}
+    @raise ValueError: The hypergraph is not undirected.
+    """
+    try:
+        assert not H.directed
+    except AssertionError:
+        raise ValueError('function only applies to undirected hypergraphs')
+    if len(H.vertices) < 2:
+        return float('inf'), 0.0
+    lower, order, upper = _sweep_cut(H)
+    return upper, max(upper - lower, 0.0)
+
+
+def _sweep_cut(H):
+    """\
+    Find the spectral lower bound and the best Fiedler sweep cut for the
+    isoperimetric number of an undirected hypergraph with at least two
+    vertices.
+
+    For X with |X| = k <= n/2, a test vector orthogonal to the all-ones vector
+    shows that |E(X)| / k >= lambda_2 (n - k) / (n * floor(r^2 / 4)), where
+    lambda_2 is the algebraic connectivity of the unweighted Laplacian and r is
+    the rank (maximum edge size) of the hypergraph.
+
+    @param H: The hypergraph.
+    @type H: L{Hypergraph}
+    @return: Lower bound, vertices in Fiedler order, and best sweep cut ratio.
+    @rtype: C{float}, C{list}, C{float}
     """
-    i = float('inf')
-    for n in range(1, int(len(H.vertices) / 2) + 1):
-        for X in combinations(H.vertices, n):
-            ex = len(edge_cut(H, set(X)))
-            if ex / n < i:
-                i = ex / n
-    return i
+    n = len(H.vertices)
+    L = laplacian_matrix(H, sparse=n > DENSE_LIMIT, weighted=False)
+    eigenvalues, eigenvectors = smallest_laplacian_eigenpairs(L)
+    r = max([len(edge) for edge in H.edges] or [0])
+    if r < 2:
+        lower = 0.0
+    else:
+        lower = max(eigenvalues[1], 0.0) * (n - n // 2) / ((r * r // 4) * n)
+    vertices = vertex_order(H)
+    order = [vertices[i] for i in \
+        numpy.argsort(eigenvectors[:, 1], kind='mergesort')]
+    upper = float('inf')
+    for sweep in [order, order[::-1]]:
+        cut = EdgeCut(H)
+        for v in sweep[:n // 2]:
+            cut.add(v)
+            if len(cut) < upper * cut.size:
+                upper = float(len(cut)) / cut.size
+    return lower, order, upper
@@ -7,10 +7,42 @@ Hypergraph - core classes.
 @license: LGPL-3
 """
 
+from collections import Mapping
+from itertools import count
+
+import numpy
+
+
+# version stamps are drawn from one sequence, so that no two hypergraph states
+# in a process share a stamp
+_versions = count()
+
+
+def _distinct_members(offsets, members):
+    """\
+    Return whether the members of each edge in compressed sparse (offset/index)
+    arrays are distinct, by stably sorting the incidences by vertex (so that an
+    edge repeating a member appears twice in a row for that vertex).
+
+    @param offsets: Offsets of each edge into C{members}.
+    @type offsets: C{numpy.ndarray}
+    @param members: Vertex ids of the members of each edge.
+    @type members: C{numpy.ndarray}
+    @rtype: C{bool}
+    """
+    edges = numpy.repeat(numpy.arange(len(offsets) - 1), numpy.diff(offsets))
+    order = numpy.argsort(members, kind='mergesort')
+    members, edges = members[order], edges[order]
+    return not numpy.any((members[1:] == members[:-1]) \
+        & (edges[1:] == edges[:-1]))
+
+
 class Edge(frozenset):
     """\
     Edge class.
     """
+    __slots__ = ('_head', '_hash')
+
     def __new__(cls, edge, head=None):
         """\
         Constructor. Verifies the immutability of the vertices.
@@ -45,19 +77,49 @@ class Edge(frozenset):
         except AssertionError:
             raise ValueError('edge has no vertex %s' % head)
         self._head = head
+        self._hash = frozenset.__hash__(self) + (hash(head) if head else 0)
+
+    @classmethod
+    def _make(cls, edge, head=None):
+        """\
+        Construct an edge without verifying its vertices or head, for bulk
+        construction from data that has already been validated.
+
+        @param edge: Initializing iterable.
+        @type edge: C{object}
+        @param head: Head vertex (optional).
+        @type head: C{object}
+        @rtype: L{Edge}
+        """
+        self = frozenset.__new__(cls, edge)
+        self._head = head
+        self._hash = frozenset.__hash__(self) + (hash(head) if head else 0)
+        return self
+
+    def __reduce__(self):
+        """\
+        Pickling support (the head is not part of the frozenset state).
+        """
+        return (type(self), (list(self), self._head))
 
     def __hash__(self):
         """\
         Hash function.
         """
-        return super(Edge, self).__hash__() + \
-            (self.head.__hash__() if self.head else 0)
+        return self._hash
 
     def __eq__(self, other):
         """\
         Equality operator.
         """
-        return frozenset.__eq__(self, other) and self.head is other.head
+        return frozenset.__eq__(self, other) is True \
+            and getattr(other, 'head', None) == self._head
+
+    def __ne__(self, other):
+        """\
+        Inequality operator.
+        """
+        return not self == other
 
     def __repr__(self):
         """\
@@ -88,6 +150,99 @@ class Edge(frozenset):
         return set(self) - set([self._head])
 
 
+class VertexIndex(dict):
+    """\
+    Mapping from the vertices of a hypergraph to dense integer ids, with the
+    inverse mapping kept as a list. Ids are assigned in the order vertices are
+    registered; removing a vertex gives its id to the vertex that held the last
+    id, so that ids always run from 0 to one less than the number of vertices.
+    Every algorithm that numbers vertices uses this order.
+    """
+    def __init__(self, vertices=()):
+        """\
+        Constructor.
+
+        @param vertices: Initial vertices, in id order.
+        @type vertices: C{list}
+        """
+        dict.__init__(self)
+        self._labels = []
+        self.extend(vertices)
+
+    @staticmethod
+    def ordered(vertices):
+        """\
+        Return vertices in the default id order (sorted if they are mutually
+        comparable, otherwise in iteration order).
+
+        @param vertices: The vertices.
+        @type vertices: C{object}
+        @rtype: C{list}
+        """
+        try:
+            return sorted(vertices)
+        except TypeError:
+            return list(vertices)
+
+    @property
+    def labels(self):
+        """\
+        Vertices, indexed by id.
+
+        @rtype: C{list}
+        """
+        return self._labels
+
+    def ids(self, vertices):
+        """\
+        Return the ids of a sequence of vertices.
+
+        @param vertices: The vertices.
+        @type vertices: C{object}
+        @return: The vertex ids.
+        @rtype: C{numpy.ndarray}
+        """
+        return numpy.fromiter((self[v] for v in vertices), dtype=numpy.int64)
+
+    def add(self, vertex):
+        """\
+        Register a vertex, if it is not already registered.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @return: The id of the vertex.
+        @rtype: C{int}
+        """
+        self.extend([vertex])
+        return self[vertex]
+
+    def extend(self, vertices):
+        """\
+        Register vertices in the order given, skipping those already registered.
+
+        @param vertices: The vertices.
+        @type vertices: C{object}
+        """
+        for vertex in vertices:
+            if vertex not in self:
+                self[vertex] = len(self._labels)
+                self._labels.append(vertex)
+
+    def remove(self, vertex):
+        """\
+        Unregister a vertex, moving the vertex with the last id into its id.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @raise KeyError: The vertex is not registered.
+        """
+        i = self.pop(vertex)
+        last = self._labels.pop()
+        if i < len(self._labels):
+            self._labels[i] = last
+            self[last] = i
+
+
 class Hypergraph(object):
     """\
     Hypergraph class.
@@ -104,7 +259,8 @@ class Hypergraph(object):
         @type weights: C{dict}
         @param directed: Directedness of this hypergraph.
         @type directed: C{bool}
-        @raise TypeError: One or more vertices are not immutable.
+        @raise TypeError: One or more vertices are not immutable, or one or
+                          more weights are not numbers.
         @raise ValueError: One or more edges are not valid for this hypergraph.
         """
         vertices = set(vertices) if vertices else set()
@@ -115,22 +271,170 @@ class Hypergraph(object):
         except (AttributeError, AssertionError):
             raise TypeError('vertices must be immutable')
         self._vertices = vertices
+        self._vertex_index = VertexIndex(VertexIndex.ordered(vertices))
+        self._edges = set()
+        self._edge_keys = {}
+        self._incident = dict((vertex, set()) for vertex in vertices)
+        self._head_incident = {}
+        self._tail_incident = {}
+        self._version = next(_versions)
         self.weights = {}
-        try:
-            for edge in edges:
+        edges = list(edges)
+        values = []
+        for edge in edges:
+            try:
                 assert isinstance(edge, Edge)
                 assert (not directed and not edge.head) \
                     or (directed and edge.head)
-                try:
-                    self.weights[edge] = float(weights[edge])
-                except (KeyError, TypeError):
-                    self.weights[edge] = 1.0
+            except AssertionError:
+                raise ValueError('invalid edge %s' % edge)
+            try:
+                values.append(float(weights[edge]) if weights else 1.0)
+            except KeyError:
+                values.append(1.0)
+            except (TypeError, ValueError):
+                raise TypeError('invalid weight for edge %s' % edge)
+        self._load(edges, values)
+
+    @classmethod
+    def from_arrays(cls, offsets, members, heads=None, weights=None,
+                    labels=None, directed=False):
+        """\
+        Construct a hypergraph in bulk from compressed sparse (offset/index)
+        arrays, as stored by L{FrozenHypergraph}. The members of edge i are the
+        vertex ids in C{members[offsets[i]:offsets[i + 1]]}, which must be
+        distinct. The arrays are validated as a whole before any edge is built.
+
+        @param offsets: Offsets of each edge into C{members} (length one more
+                        than the number of edges).
+        @type offsets: C{numpy.ndarray}
+        @param members: Vertex ids of the members of each edge.
+        @type members: C{numpy.ndarray}
+        @param heads: Head vertex id of each edge (directed only).
+        @type heads: C{numpy.ndarray}
+        @param weights: Weight of each edge (optional).
+        @type weights: C{numpy.ndarray}
+        @param labels: Vertex objects, indexed by vertex id (optional, the ids
+                       themselves by default). The ids are kept in the vertex
+                       index of the hypergraph.
+        @type labels: C{list}
+        @param directed: Directedness of the hypergraph.
+        @type directed: C{bool}
+        @return: The hypergraph.
+        @rtype: L{Hypergraph}
+        @raise ValueError: The arrays do not describe a valid hypergraph.
+        """
+        offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        members = numpy.asarray(members, dtype=numpy.int64)
+        if labels is None:
+            labels = range(int(members.max()) + 1 if len(members) else 0)
+        labels = list(labels)
+        nedges = len(offsets) - 1
+        if weights is None:
+            weights = numpy.ones(max(nedges, 0))
+        weights = numpy.asarray(weights, dtype=numpy.float64)
+        try:
+            assert offsets.ndim == 1 and members.ndim == 1
+            assert nedges >= 0 and offsets[0] == 0
+            assert offsets[-1] == len(members)
+            sizes = numpy.diff(offsets)
+            assert numpy.all(sizes > 0)
+            assert not len(members) or \
+                (members.min() >= 0 and members.max() < len(labels))
+            assert _distinct_members(offsets, members)
+            assert weights.shape == (nedges,)
+            assert not issubclass(cls, Graph) or numpy.all(sizes == 2)
+            assert len(set(labels)) == len(labels)
+            assert (heads is not None) == directed
+            if directed:
+                heads = numpy.asarray(heads, dtype=numpy.int64)
+                assert heads.shape == (nedges,)
+                assert not nedges or numpy.logical_or.reduceat(
+                    members == numpy.repeat(heads, sizes), offsets[:-1]).all()
         except AssertionError:
-            raise ValueError('invalid edge %s' % edge)
-        except TypeError:
-            pass
-        self._vertices.update(*edges)
-        self._edges = edges
+            raise ValueError('invalid hypergraph arrays')
+        H = cls(directed=directed)
+        H._vertex_index = VertexIndex(labels)
+        H._vertices.update(labels)
+        H._incident = dict((vertex, set()) for vertex in labels)
+        bounds = offsets.tolist()
+        members = [labels[i] for i in members.tolist()]
+        if directed:
+            edges = [Edge._make(members[bounds[e]:bounds[e + 1]], labels[h]) \
+                for e, h in enumerate(heads.tolist())]
+        else:
+            edges = [Edge._make(members[bounds[e]:bounds[e + 1]]) \
+                for e in range(nedges)]
+        H._load(edges, weights.tolist())
+        return H
+
+    @classmethod
+    def from_edge_list(cls, edges, weights=None, directed=False):
+        """\
+        Construct a hypergraph in bulk from a sequence of vertex tuples, one
+        per edge. In a directed hypergraph, the last vertex of each tuple is
+        the head of the edge.
+
+        @param edges: Vertex tuples.
+        @type edges: C{list} of C{tuple}
+        @param weights: Weight of each edge (optional).
+        @type weights: C{list} of C{float}
+        @param directed: Directedness of the hypergraph.
+        @type directed: C{bool}
+        @return: The hypergraph.
+        @rtype: L{Hypergraph}
+        @raise ValueError: The tuples do not describe a valid hypergraph.
+        """
+        offsets, members, heads = [0], [], []
+        for edge in edges:
+            members.extend(edge)
+            if directed and len(members) > offsets[-1]:
+                heads.append(members[-1])
+            offsets.append(len(members))
+        index = VertexIndex(VertexIndex.ordered(set(members)))
+        return cls.from_arrays(offsets, index.ids(members), index.ids(heads) \
+            if directed else None, weights, index.labels, directed)
+
+    @classmethod
+    def from_incidence(cls, B, weights=None, labels=None, directed=False):
+        """\
+        Construct a hypergraph in bulk from a vertex-edge incidence matrix, as
+        returned by L{incidence_matrix<hypergraph.matrix.incidence_matrix>}.
+        Every nonzero entry makes its row a member of the edge of its column;
+        in a directed hypergraph, the single positive entry of each column marks
+        the head. Requires SciPy.
+
+        @param B: Incidence matrix (dense or sparse).
+        @type B: C{scipy.sparse.spmatrix}
+        @param weights: Weight of each edge (optional).
+        @type weights: C{numpy.ndarray}
+        @param labels: Vertex objects, indexed by row (optional, the row
+                       numbers themselves by default).
+        @type labels: C{list}
+        @param directed: Directedness of the hypergraph.
+        @type directed: C{bool}
+        @return: The hypergraph.
+        @rtype: L{Hypergraph}
+        @raise ValueError: The matrix does not describe a valid hypergraph.
+        """
+        import scipy.sparse
+        B = scipy.sparse.csc_matrix(B)
+        B.eliminate_zeros()
+        B.sort_indices()
+        if labels is None:
+            labels = range(B.shape[0])
+        heads = None
+        if directed:
+            positive = B.data > 0
+            try:
+                assert numpy.all(numpy.diff(B.indptr) > 0)
+                assert not B.shape[1] or numpy.all(numpy.add.reduceat(
+                    positive.astype(numpy.int64), B.indptr[:-1]) == 1)
+            except AssertionError:
+                raise ValueError('invalid incidence matrix')
+            heads = B.indices[positive]
+        return cls.from_arrays(B.indptr, B.indices, heads, weights, labels,
+            directed)
 
     def __eq__(self, other):
         """\
@@ -165,6 +469,9 @@ class Hypergraph(object):
         except (AttributeError, AssertionError):
             raise TypeError('vertex must be immutable')
         self._vertices.add(vertex)
+        self._vertex_index.add(vertex)
+        self._incident.setdefault(vertex, set())
+        self._touch()
 
     def remove_vertex(self, vertex):
         """\
@@ -173,11 +480,12 @@ class Hypergraph(object):
         @param vertex: The vertex object to remove.
         @type vertex: C{object}
         """
-        edges = set(self.edges)
-        for edge in edges:
-            if vertex in edge:
-                self.remove_edge(edge)
+        for edge in list(self._incident.get(vertex, ())):
+            self.remove_edge(edge)
         self._vertices.remove(vertex)
+        self._vertex_index.remove(vertex)
+        del self._incident[vertex]
+        self._touch()
 
     def add_edge(self, edge, weight=1.0):
         """\
@@ -195,9 +503,10 @@ class Hypergraph(object):
                 or (self.directed and edge.head)
         except AssertionError:
             raise ValueError('invalid edge %s' % edge)
-        self._vertices.update(edge)
-        self._edges.add(edge)
+        self._add_vertices(edge)
+        self._index_edge(edge)
         self.weights[edge] = weight
+        self._touch()
 
     def remove_edge(self, edge):
         """\
@@ -208,6 +517,90 @@ class Hypergraph(object):
         """
         del self.weights[edge]
         self._edges.remove(edge)
+        del self._edge_keys[edge]
+        for vertex in edge:
+            self._incident[vertex].discard(edge)
+        if edge.head is not None:
+            self._head_incident[edge.head].discard(edge)
+            for vertex in edge:
+                if vertex != edge.head:
+                    self._tail_incident[vertex].discard(edge)
+        self._touch()
+
+    def _load(self, edges, weights):
+        """\
+        Add validated edges and their weights in a single pass.
+
+        @param edges: The edges to add.
+        @type edges: C{list} of L{Edge}
+        @param weights: The weights of the edges, in the same order.
+        @type weights: C{list} of C{float}
+        """
+        self._add_vertices(set().union(*edges))
+        for edge in edges:
+            self._index_edge(edge)
+        self.weights.update(zip(edges, weights))
+
+    def _add_vertices(self, vertices):
+        """\
+        Add any new vertices among the given vertices, registering them in the
+        vertex index in default order.
+
+        @param vertices: The vertices.
+        @type vertices: C{set}
+        """
+        new = [vertex for vertex in vertices if vertex not in self._vertices]
+        if new:
+            self._vertices.update(new)
+            self._vertex_index.extend(VertexIndex.ordered(new))
+
+    def _index_edge(self, edge):
+        """\
+        Add an edge to the edge set, the incidence indexes, and the lookup
+        table of edges by vertex set and head.
+
+        @param edge: The edge to index.
+        @type edge: L{Edge}
+        """
+        self._edges.add(edge)
+        self._edge_keys.setdefault(edge, edge)
+        for vertex in edge:
+            self._incident.setdefault(vertex, set()).add(edge)
+        if edge.head is not None:
+            self._head_incident.setdefault(edge.head, set()).add(edge)
+            for vertex in edge:
+                if vertex != edge.head:
+                    self._tail_incident.setdefault(vertex, set()).add(edge)
+
+    def _touch(self):
+        """\
+        Record a change to this hypergraph by assigning it a new version.
+        """
+        self._version = next(_versions)
+
+    @property
+    def weights(self):
+        """\
+        Weight relation of the hypergraph. Changes to it update the version.
+
+        @rtype: C{dict}
+        """
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights):
+        self._weights = _Weights(self, weights)
+        self._touch()
+
+    @property
+    def version(self):
+        """\
+        Version stamp of the hypergraph, which changes whenever a vertex, edge,
+        or weight is added, removed, or changed.
+
+        @rtype: C{int}
+        """
+        return self._version
 
     @property
     def directed(self):
@@ -218,6 +611,16 @@ class Hypergraph(object):
         """
         return self._directed
 
+    @property
+    def vertex_index(self):
+        """\
+        Integer ids of the vertices of this hypergraph, maintained as vertices
+        are added and removed.
+
+        @rtype: L{VertexIndex}
+        """
+        return self._vertex_index
+
     @property
     def vertices(self):
         """\
@@ -262,6 +665,41 @@ class Hypergraph(object):
             d = self.degree(iter(self.vertices).next())
         return all([self.degree(vertex) == d for vertex in self.vertices])
 
+    def edge(self, vertices, head=None):
+        """\
+        Return the edge object stored in this hypergraph with the given vertices
+        and head, so that repeated lookups share a single object.
+
+        @param vertices: The vertices of the edge.
+        @type vertices: C{object}
+        @param head: The head vertex of the edge (optional).
+        @type head: C{object}
+        @return: The stored edge.
+        @rtype: L{Edge}
+        @raise KeyError: The edge is not in this hypergraph.
+        """
+        try:
+            if not (isinstance(vertices, Edge) and vertices.head == head):
+                vertices = Edge._make(vertices, head)
+            return self._edge_keys[vertices]
+        except (KeyError, TypeError):
+            raise KeyError((tuple(vertices), head))
+
+    def weight(self, vertices, head=None):
+        """\
+        Return the weight of the edge with the given vertices and head, without
+        constructing an edge object.
+
+        @param vertices: The vertices of the edge.
+        @type vertices: C{object}
+        @param head: The head vertex of the edge (optional).
+        @type head: C{object}
+        @return: The weight of the edge.
+        @rtype: C{float}
+        @raise KeyError: The edge is not in this hypergraph.
+        """
+        return self.weights[self.edge(vertices, head)]
+
     def adjacent(self, u, v):
         """\
 
@@ -274,7 +712,7 @@ class Hypergraph(object):
         """
         if u == v:
             return set()
-        return set([edge for edge in self.edges if u in edge and v in edge])
+        return self._incident.get(u, set()) & self._incident.get(v, set())
 
     def incident(self, v, forward=True):
         """\
@@ -292,11 +730,12 @@ class Hypergraph(object):
         @return: A set of incident edges.
         @rtype: C{set} of L{Edge}
         """
-        if forward and self.directed:
-            return set([edge for edge in self.edges if edge.head == v])
+        if not self.directed:
+            return set(self._incident.get(v, ()))
+        elif forward:
+            return set(self._head_incident.get(v, ()))
         else:
-            return set([edge for edge in self.edges \
-                if v in edge and edge.head != v])
+            return set(self._tail_incident.get(v, ()))
 
     def reachable(self, tail, head):
         """\
@@ -325,7 +764,14 @@ class Hypergraph(object):
         @return: The set of vertices adjacent to the vertex.
         @rtype: C{set}
         """
-        return set([v for v in self.vertices if self.reachable(vertex, v)])
+        if self.directed:
+            return set([edge.head for edge \
+                in self._tail_incident.get(vertex, ())])
+        neighbors = set()
+        for edge in self._incident.get(vertex, ()):
+            neighbors.update(edge)
+        neighbors.discard(vertex)
+        return neighbors
 
     def degree(self, vertex, weighted=True):
         """\
@@ -339,7 +785,7 @@ class Hypergraph(object):
         @rtype: C{float}
         """
         return sum([self.weights[edge] if weighted else 1 for edge \
-            in self.edges if vertex in edge])
+            in self._incident.get(vertex, ())])
 
     def indegree(self, vertex, weighted=True):
         """\
@@ -355,7 +801,7 @@ class Hypergraph(object):
         if not self.directed:
             return self.degree(vertex, weighted)
         return sum([self.weights[edge] if weighted else 1 for edge \
-            in self.edges if edge.head == vertex])
+            in self._head_incident.get(vertex, ())])
         
     def outdegree(self, vertex, weighted=True):
         """\
@@ -371,8 +817,32 @@ class Hypergraph(object):
         if not self.directed:
             return self.degree(vertex, weighted)
         return sum([self.weights[edge] if weighted else 1 for edge \
-            in self.edges if vertex in edge and edge.head != vertex])
-        
+            in self._tail_incident.get(vertex, ())])
+
+    def freeze(self):
+        """\
+        Return an immutable, compact snapshot of this hypergraph. Vertices keep
+        their ids from L{vertex_index} and edges are numbered in order of their
+        sorted vertex ids.
+
+        @return: Frozen snapshot of this hypergraph.
+        @rtype: L{FrozenHypergraph}
+        """
+        index = self._vertex_index
+        labels = index.labels
+        keyed = sorted([(sorted([index[v] for v in edge]),
+            index[edge.head] if edge.head is not None else -1, edge) \
+            for edge in self.edges], key=lambda k: k[:2])
+        offsets = numpy.zeros(len(keyed) + 1, dtype=numpy.int64)
+        offsets[1:] = numpy.cumsum([len(k[0]) for k in keyed])
+        members = numpy.fromiter((i for k in keyed for i in k[0]),
+            dtype=numpy.int64, count=offsets[-1])
+        heads = numpy.array([k[1] for k in keyed], dtype=numpy.int64)
+        weights = numpy.array([self.weights[k[2]] for k in keyed],
+            dtype=numpy.float64)
+        return FrozenHypergraph(labels, offsets, members, heads, weights,
+            directed=self.directed)
+
 
 class Graph(Hypergraph):
     """\
@@ -410,3 +880,682 @@ class Graph(Hypergraph):
         @rtype: C{bool}
         """
         return k is None or k == 2
+
+
+class FrozenHypergraph(object):
+    """\
+    Immutable hypergraph snapshot. Vertices are identified internally by
+    integer ids, and the edge-vertex incidence relation is stored in both
+    directions as compressed sparse (offset/index) arrays. Supports the query
+    interface of L{Hypergraph}.
+    """
+    def __init__(self, labels, edge_offsets, edge_members, heads=None,
+                 weights=None, directed=False, vertex_offsets=None,
+                 vertex_edges=None, validate=True):
+        """\
+        Constructor. Arrays which are already read-only and of the right type
+        (such as read-only memory maps) are used without copying. The vertex
+        labels, their index, and the edge objects are built on first use.
+
+        @param labels: Vertex objects, indexed by vertex id.
+        @type labels: C{list}
+        @param edge_offsets: Offsets of each edge into C{edge_members} (length
+                             one more than the number of edges).
+        @type edge_offsets: C{numpy.ndarray}
+        @param edge_members: Vertex ids of the members of each edge.
+        @type edge_members: C{numpy.ndarray}
+        @param heads: Head vertex id of each edge, -1 for none (optional).
+        @type heads: C{numpy.ndarray}
+        @param weights: Weight of each edge (optional).
+        @type weights: C{numpy.ndarray}
+        @param directed: Directedness of this hypergraph.
+        @type directed: C{bool}
+        @param vertex_offsets: Offsets of each vertex into C{vertex_edges}, if
+                               already computed (optional).
+        @type vertex_offsets: C{numpy.ndarray}
+        @param vertex_edges: Ids of the edges containing each vertex, in order,
+                             if already computed (optional).
+        @type vertex_edges: C{numpy.ndarray}
+        @param validate: Check the arrays (this may be skipped for trusted
+                         data, such as files written by L{hypergraph.fileio}).
+                         The labels are checked for duplicates when their
+                         index is first built.
+        @type validate: C{bool}
+        @raise ValueError: The arrays do not describe a valid hypergraph.
+        """
+        self._label_source = labels
+        self._label_tuple = None
+        self._vertex_index = None
+        self._vertex_frozenset = None
+        self._nvertices = len(labels)
+        self._directed = directed
+        self._edge_offsets = self._lock(edge_offsets, numpy.int64)
+        self._edge_members = self._lock(edge_members, numpy.int64)
+        nedges = len(self._edge_offsets) - 1
+        if heads is None:
+            heads = -numpy.ones(nedges, dtype=numpy.int64)
+        if weights is None:
+            weights = numpy.ones(nedges, dtype=numpy.float64)
+        self._heads = self._lock(heads, numpy.int64)
+        self._weights = self._lock(weights, numpy.float64)
+        if validate:
+            sizes = numpy.diff(self._edge_offsets)
+            try:
+                assert nedges >= 0 and self._edge_offsets[0] == 0
+                assert self._edge_offsets[-1] == len(self._edge_members)
+                assert numpy.all(sizes > 0)
+                assert len(self._heads) == nedges == len(self._weights)
+                assert not len(self._edge_members) or \
+                    (self._edge_members.min() >= 0 and \
+                     self._edge_members.max() < self._nvertices)
+                assert numpy.all((self._heads >= 0) == directed)
+                assert numpy.all(self._heads < self._nvertices)
+                assert not (directed and nedges) or numpy.logical_or.reduceat(
+                    self._edge_members == numpy.repeat(self._heads, sizes),
+                    self._edge_offsets[:-1]).all()
+            except AssertionError:
+                raise ValueError('invalid hypergraph arrays')
+        if validate or vertex_offsets is None or vertex_edges is None:
+            expected = self._transpose()
+        if vertex_offsets is None or vertex_edges is None:
+            vertex_offsets, vertex_edges = expected
+        if validate:
+            # the transpose lists the edges of each vertex in increasing order,
+            # so an edge repeating a member appears twice in a row
+            vertices = numpy.repeat(numpy.arange(self._nvertices),
+                numpy.diff(expected[0]))
+            try:
+                assert not numpy.any((expected[1][1:] == expected[1][:-1]) \
+                    & (vertices[1:] == vertices[:-1]))
+                assert numpy.array_equal(vertex_offsets, expected[0])
+                assert numpy.array_equal(vertex_edges, expected[1])
+            except AssertionError:
+                raise ValueError('invalid hypergraph arrays')
+        self._vertex_offsets = self._lock(vertex_offsets, numpy.int64)
+        self._vertex_edges = self._lock(vertex_edges, numpy.int64)
+        self._pool = {}
+        self._edge_ids = None
+        self._version = next(_versions)
+        self.weights = _FrozenWeights(self)
+
+    def _transpose(self):
+        """\
+        Compute the vertex-edge incidence arrays from the edge-vertex incidence
+        arrays.
+
+        @return: Vertex offsets and vertex edges.
+        @rtype: C{tuple} of C{numpy.ndarray}
+        """
+        sizes = numpy.diff(self._edge_offsets)
+        edge_ids = numpy.repeat(numpy.arange(len(sizes), dtype=numpy.int64),
+            sizes)
+        order = numpy.argsort(self._edge_members, kind='mergesort')
+        vertex_offsets = numpy.zeros(self._nvertices + 1, dtype=numpy.int64)
+        vertex_offsets[1:] = numpy.cumsum(numpy.bincount(self._edge_members,
+            minlength=self._nvertices))
+        return vertex_offsets, edge_ids[order]
+
+    @staticmethod
+    def _lock(array, dtype):
+        """\
+        Return a read-only array of the given type with the given contents,
+        which is the given array itself if it is already read-only.
+        """
+        if isinstance(array, numpy.ndarray) and array.dtype == dtype \
+            and not array.flags.writeable:
+            return array
+        array = numpy.array(array, dtype=dtype)
+        array.flags.writeable = False
+        return array
+
+    @property
+    def _labels(self):
+        """\
+        Vertex objects, indexed by vertex id.
+
+        @rtype: C{tuple}
+        """
+        if self._label_tuple is None:
+            labels = self._label_source
+            self._label_tuple = tuple(labels.tolist() \
+                if isinstance(labels, numpy.ndarray) else labels)
+        return self._label_tuple
+
+    @property
+    def _index(self):
+        """\
+        Vertex index.
+
+        @rtype: L{VertexIndex}
+        @raise ValueError: The vertex labels are not distinct.
+        """
+        if self._vertex_index is None:
+            index = VertexIndex(self._labels)
+            if len(index) != self._nvertices:
+                raise ValueError('duplicate vertex labels')
+            self._vertex_index = index
+        return self._vertex_index
+
+    def __eq__(self, other):
+        """\
+        Equality operator.
+
+        @rtype: C{bool}
+        """
+        return self.vertices == other.vertices and self.edges == other.edges \
+            and all([abs(self.weights[edge] - other.weights[edge]) < 1e-4 \
+            for edge in self.edges])
+
+    def __repr__(self):
+        """\
+        Canonical string representation.
+
+        @rtype: C{str}
+        """
+        return '%s(labels=%s, edge_offsets=%s, edge_members=%s, heads=%s, ' \
+            'weights=%s, directed=%s)' % (type(self).__name__,
+            list(self._labels), self._edge_offsets.tolist(),
+            self._edge_members.tolist(), self._heads.tolist(),
+            self._weights.tolist(), self.directed)
+
+    def _edge(self, e):
+        """\
+        Return the edge object for an edge id.
+
+        @param e: The edge id.
+        @type e: C{int}
+        @rtype: L{Edge}
+        """
+        edge = self._pool.get(e)
+        if edge is None:
+            labels = self._labels
+            members = self._edge_members[self._edge_offsets[e]:\
+                self._edge_offsets[e + 1]].tolist()
+            edge = self._pool[e] = Edge._make([labels[i] for i in members],
+                labels[self._heads[e]] if self._heads[e] >= 0 else None)
+        return edge
+
+    def _edge_id(self, vertices, head=None):
+        """\
+        Return the edge id of the edge with the given vertices and head, from a
+        table of the edges built on first use.
+
+        @param vertices: The vertices of the edge.
+        @type vertices: C{object}
+        @param head: The head vertex of the edge (optional).
+        @type head: C{object}
+        @rtype: C{int}
+        @raise KeyError: The edge is not in this hypergraph.
+        """
+        if self._edge_ids is None:
+            self._edge_ids = dict((self._edge(e), e) \
+                for e in xrange(len(self._heads)))
+        try:
+            if not (isinstance(vertices, Edge) and vertices.head == head):
+                vertices = Edge._make(vertices, head)
+            return self._edge_ids[vertices]
+        except (KeyError, TypeError):
+            raise KeyError((tuple(vertices), head))
+
+    def _incident_ids(self, u):
+        """\
+        Return the ids of the edges containing a vertex.
+
+        @param u: The vertex id.
+        @type u: C{int}
+        @rtype: C{numpy.ndarray}
+        """
+        return self._vertex_edges[self._vertex_offsets[u]:\
+            self._vertex_offsets[u + 1]]
+
+    def _incident_mask(self, v, forward):
+        """\
+        Return the ids of the edges incident on a vertex, in the sense of
+        L{incident}.
+
+        @param v: The vertex.
+        @type v: C{object}
+        @param forward: Direction of incidence.
+        @type forward: C{bool}
+        @rtype: C{numpy.ndarray}
+        """
+        try:
+            u = self._index[v]
+        except KeyError:
+            return numpy.zeros(0, dtype=numpy.int64)
+        E = self._incident_ids(u)
+        if not self.directed:
+            return E
+        elif forward:
+            return E[self._heads[E] == u]
+        else:
+            return E[self._heads[E] != u]
+
+    @property
+    def directed(self):
+        """\
+        Directedness of the hypergraph.
+
+        @rtype: C{bool}
+        """
+        return self._directed
+
+    @property
+    def vertex_index(self):
+        """\
+        Integer ids of the vertices of the hypergraph (not to be modified).
+
+        @rtype: L{VertexIndex}
+        """
+        return self._index
+
+    @property
+    def vertices(self):
+        """\
+        Vertex set of the hypergraph.
+
+        @rtype: C{frozenset}
+        """
+        if self._vertex_frozenset is None:
+            self._vertex_frozenset = frozenset(self._labels)
+        return self._vertex_frozenset
+
+    @property
+    def edges(self):
+        """\
+        Edge set of the hypergraph. The edge objects are constructed on first
+        access.
+
+        @rtype: C{frozenset}
+        """
+        return frozenset([self._edge(e) for e in range(len(self._heads))])
+
+    @property
+    def version(self):
+        """\
+        Version stamp of the hypergraph, which never changes.
+
+        @rtype: C{int}
+        """
+        return self._version
+
+    @property
+    def labels(self):
+        """\
+        Vertex objects, indexed by vertex id.
+
+        @rtype: C{tuple}
+        """
+        return self._labels
+
+    @property
+    def edge_offsets(self):
+        """\
+        Offsets of each edge into L{edge_members}.
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._edge_offsets
+
+    @property
+    def edge_members(self):
+        """\
+        Member vertex ids of each edge.
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._edge_members
+
+    @property
+    def vertex_offsets(self):
+        """\
+        Offsets of each vertex into L{vertex_edges}.
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._vertex_offsets
+
+    @property
+    def vertex_edges(self):
+        """\
+        Ids of the edges containing each vertex.
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._vertex_edges
+
+    @property
+    def heads(self):
+        """\
+        Head vertex id of each edge (-1 if undirected).
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._heads
+
+    @property
+    def edge_weights(self):
+        """\
+        Weight of each edge.
+
+        @rtype: C{numpy.ndarray}
+        """
+        return self._weights
+
+    def freeze(self):
+        """\
+        Return this hypergraph, which is already frozen.
+
+        @rtype: L{FrozenHypergraph}
+        """
+        return self
+
+    def thaw(self):
+        """\
+        Return a mutable copy of this hypergraph.
+
+        @return: Mutable copy of this hypergraph.
+        @rtype: L{Hypergraph}
+        """
+        return Hypergraph.from_arrays(self._edge_offsets, self._edge_members,
+            self._heads if self.directed else None, self._weights,
+            self._labels, self.directed)
+
+    def uniform(self, k=None):
+        """\
+        Return whether this is a k-uniform hypergraph.
+
+        @param k: The value of k (optional).
+        @type k: C{int}
+        @return: Uniformity.
+        @rtype: C{bool}
+        """
+        sizes = numpy.diff(self._edge_offsets)
+        if k is None:
+            k = sizes[0] if len(sizes) else 0
+        return bool(numpy.all(sizes == k))
+
+    def regular(self, d=None):
+        """\
+        Return whether this is a d-regular hypergraph.
+
+        @param d: The value of d (optional).
+        @type d: C{int}
+        @return: Regularity.
+        @rtype: C{bool}
+        """
+        degrees = numpy.bincount(self._edge_members, weights=numpy.repeat(
+            self._weights, numpy.diff(self._edge_offsets)),
+            minlength=self._nvertices)
+        if d is None:
+            d = self.degree(next(iter(self.vertices)))
+        return bool(numpy.all(numpy.abs(degrees - d) < 1e-9))
+
+    def edge(self, vertices, head=None):
+        """\
+        Return the edge object with the given vertices and head. Edge objects
+        are built on first use and shared thereafter.
+
+        @param vertices: The vertices of the edge.
+        @type vertices: C{object}
+        @param head: The head vertex of the edge (optional).
+        @type head: C{object}
+        @return: The edge.
+        @rtype: L{Edge}
+        @raise KeyError: The edge is not in this hypergraph.
+        """
+        return self._edge(self._edge_id(vertices, head))
+
+    def weight(self, vertices, head=None):
+        """\
+        Return the weight of the edge with the given vertices and head, without
+        constructing an edge object.
+
+        @param vertices: The vertices of the edge.
+        @type vertices: C{object}
+        @param head: The head vertex of the edge (optional).
+        @type head: C{object}
+        @return: The weight of the edge.
+        @rtype: C{float}
+        @raise KeyError: The edge is not in this hypergraph.
+        """
+        return float(self._weights[self._edge_id(vertices, head)])
+
+    def adjacent(self, u, v):
+        """\
+        Return the set of edges containing both of two vertices.
+
+        @param u: The first vertex.
+        @type u: C{object}
+        @param v: The second vertex.
+        @type v: C{object}
+        @return: A set of edges.
+        @rtype: C{set} of L{Edge}
+        """
+        if u == v or not u in self._index or not v in self._index:
+            return set()
+        E = numpy.intersect1d(self._incident_ids(self._index[u]),
+            self._incident_ids(self._index[v]))
+        return set([self._edge(e) for e in E])
+
+    def incident(self, v, forward=True):
+        """\
+        Return a set of edges incident on a vertex. See L{Hypergraph.incident}.
+
+        @param v: The vertex.
+        @type v: C{object}
+        @param forward: Direction of incidence.
+        @type forward: C{bool}
+        @return: A set of incident edges.
+        @rtype: C{set} of L{Edge}
+        """
+        return set([self._edge(e) for e in self._incident_mask(v, forward)])
+
+    def reachable(self, tail, head):
+        """\
+        Return a set of edges which contain the tail vertex and are directed
+        into the head vertex.
+
+        @param tail: The tail vertex.
+        @type tail: C{object}
+        @param head: The head vertex.
+        @type head: C{object}
+        @return: A set of edges from tail to head.
+        @rtype: C{set} of L{Edge}
+        """
+        if self.directed:
+            return self.adjacent(tail, head) & self.incident(head)
+        else:
+            return self.adjacent(tail, head)
+
+    def neighbors(self, vertex):
+        """\
+        Return the set of vertices which are adjacent (in an undirected
+        hypergraph) or incident (in a directed hypergraph) to a given vertex.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @return: The set of vertices adjacent to the vertex.
+        @rtype: C{set}
+        """
+        E = self._incident_mask(vertex, False)
+        if self.directed:
+            ids = self._heads[E]
+        else:
+            ids = numpy.concatenate([self._edge_members[self._edge_offsets[e]:\
+                self._edge_offsets[e + 1]] for e in E] or [[]])
+        neighbors = set([self._labels[i] for i in numpy.unique(ids)])
+        neighbors.discard(vertex)
+        return neighbors
+
+    def degree(self, vertex, weighted=True):
+        """\
+        Return the (weighted) degree of the given vertex.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @param weighted: Return the weighted degree if true.
+        @type weighted: C{bool}
+        @return: Degree of the vertex.
+        @rtype: C{float}
+        """
+        try:
+            E = self._incident_ids(self._index[vertex])
+        except KeyError:
+            return 0
+        return float(self._weights[E].sum()) if weighted else len(E)
+
+    def indegree(self, vertex, weighted=True):
+        """\
+        Return the (weighted) indegree of the given vertex.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @param weighted: Return the weighted indegree if true.
+        @type weighted: C{bool}
+        @return: Indegree of the vertex.
+        @rtype: C{float}
+        """
+        if not self.directed:
+            return self.degree(vertex, weighted)
+        E = self._incident_mask(vertex, True)
+        return float(self._weights[E].sum()) if weighted else len(E)
+
+    def outdegree(self, vertex, weighted=True):
+        """\
+        Return the (weighted) outdegree of the given vertex.
+
+        @param vertex: The vertex.
+        @type vertex: C{object}
+        @param weighted: Return the weighted outdegree if true.
+        @type weighted: C{bool}
+        @return: Outdegree of the vertex.
+        @rtype: C{float}
+        """
+        if not self.directed:
+            return self.degree(vertex, weighted)
+        E = self._incident_mask(vertex, False)
+        return float(self._weights[E].sum()) if weighted else len(E)
+
+
+class _Weights(dict):
+    """\
+    Weight relation of a L{Hypergraph}, which assigns the hypergraph a new
+    version whenever it is changed.
+    """
+    def __init__(self, H, *args, **kwargs):
+        """\
+        Constructor, binding the weights to their hypergraph.
+        """
+        dict.__init__(self, *args, **kwargs)
+        self._H = H
+
+    def _changed(self):
+        """\
+        Assign the hypergraph a new version after a change.
+        """
+        # unpickling fills the items before the owner is restored
+        H = getattr(self, '_H', None)
+        if H is not None:
+            H._touch()
+
+    def __copy__(self):
+        """\
+        Return a plain dictionary copy, which is not bound to the hypergraph.
+
+        @rtype: C{dict}
+        """
+        return dict(self)
+
+    copy = __copy__
+
+    def __setitem__(self, key, value):
+        """\
+        Set the weight of an edge.
+        """
+        dict.__setitem__(self, key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        """\
+        Delete the weight of an edge.
+        """
+        dict.__delitem__(self, key)
+        self._changed()
+
+    def clear(self):
+        """\
+        Delete all weights.
+        """
+        dict.clear(self)
+        self._changed()
+
+    def pop(self, *args):
+        """\
+        Delete and return the weight of an edge.
+        """
+        value = dict.pop(self, *args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        """\
+        Delete and return an arbitrary (edge, weight) pair.
+        """
+        item = dict.popitem(self)
+        self._changed()
+        return item
+
+    def setdefault(self, key, default=None):
+        """\
+        Return the weight of an edge, setting it to the default if absent.
+        """
+        value = dict.setdefault(self, key, default)
+        self._changed()
+        return value
+
+    def update(self, *args, **kwargs):
+        """\
+        Set the weights of several edges.
+        """
+        dict.update(self, *args, **kwargs)
+        self._changed()
+
+
+class _FrozenWeights(Mapping):
+    """\
+    Read-only weight relation of a L{FrozenHypergraph}.
+    """
+    def __init__(self, H):
+        """\
+        Constructor, binding the weights to their hypergraph.
+        """
+        self._H = H
+
+    def __getitem__(self, edge):
+        """\
+        Return the weight of an edge.
+        """
+        try:
+            return float(self._H._weights[self._H._edge_id(edge,
+                getattr(edge, 'head', None))])
+        except KeyError:
+            raise KeyError(edge)
+
+    def __iter__(self):
+        """\
+        Iterate over the edges, in id order.
+        """
+        return (self._H._edge(e) for e in range(len(self._H._weights)))
+
+    def __len__(self):
+        """\
+        Number of edges.
+        """
+        return len(self._H._weights)
+
+    def values(self):
+        """\
+        Return the weights, in edge id order.
+        """
+        return self._H._weights.tolist()
@@ -0,0 +1,578 @@
+"""\
+Hypergraph - reading and writing hypergraph files.
+
+Two text formats are supported: the hMETIS hypergraph format (.hgr), and
+whitespace-separated edge lists with one edge per line. Files are read in
+chunks of edges, which are converted to integer arrays as they are read, so
+that the memory needed beyond the result is bounded by the chunk size. Input
+compressed with gzip is detected and decompressed transparently, and output is
+compressed if the file name ends in .gz. In a directed hypergraph, the last
+vertex of each line is the head of the edge.
+
+A binary format stores the arrays of a L{FrozenHypergraph} as they are laid out
+in memory, and can be loaded through a read-only memory map, so that processes
+opening the same file share its pages.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: LGPL-3
+"""
+
+import gzip
+import struct
+from contextlib import contextmanager
+from cPickle import dumps, loads, HIGHEST_PROTOCOL
+
+import numpy
+
+from .core import Hypergraph, FrozenHypergraph, VertexIndex
+
+
+CHUNKSIZE = 65536
+
+# binary format: magic number, version, flags (bit 0: directed), label kind,
+# numbers of vertices, edges and members, then the (offset, size) in bytes of
+# each array section, in the order of _SECTIONS
+_MAGIC = '\x89HGB\r\n\x1a\n'
+_VERSION = 1
+_SECTIONS = ('edge_offsets', 'edge_members', 'heads', 'weights',
+    'vertex_offsets', 'vertex_edges', 'labels', 'label_offsets')
+_HEADER = struct.Struct('<8sIIIIqqq%dq' % (2 * len(_SECTIONS)))
+_ALIGN = 64
+_INTEGER, _BYTES, _UNICODE, _PICKLE = range(4)
+_GZIP_MAGIC = '\x1f\x8b'
+
+
+@contextmanager
+def _open(source, mode='rb'):
+    """\
+    Open a file by name, or use an open file object. When reading, gzip input
+    is detected by its magic number, for file names and for file objects that
+    support peeking or seeking (other streams are read as they are); when
+    writing, output is compressed if the file name ends in .gz.
+
+    @param source: File name or file object.
+    @type source: C{str} or C{file}
+    @param mode: File mode, 'rb' or 'wb'.
+    @type mode: C{str}
+    """
+    if hasattr(source, 'read') or hasattr(source, 'write'):
+        if not mode.startswith('r') or _magic(source) != _GZIP_MAGIC:
+            yield source
+            return
+        f = gzip.GzipFile(fileobj=source, mode='rb')
+    elif mode.startswith('r'):
+        f = open(source, 'rb')
+        magic = f.read(2)
+        f.close()
+        f = gzip.open(source, 'rb') if magic == _GZIP_MAGIC \
+            else open(source, 'rb')
+    else:
+        f = gzip.open(source, 'wb') if source.endswith('.gz') \
+            else open(source, 'wb')
+    try:
+        yield f
+    finally:
+        f.close()
+
+
+def _magic(f):
+    """\
+    Return the first two bytes remaining in a file object without consuming
+    them, or None if the file object can neither peek nor seek.
+
+    @param f: The file object.
+    @type f: C{file}
+    @rtype: C{str}
+    """
+    if hasattr(f, 'peek'):
+        return f.peek(2)[:2]
+    try:
+        position = f.tell()
+        magic = f.read(2)
+        f.seek(position)
+    except (AttributeError, IOError):
+        return None
+    return magic
+
+
+def _lines(f, comment):
+    """\
+    Generate the stripped, nonblank lines of a file which are not comments.
+
+    @param f: The file object.
+    @type f: C{file}
+    @param comment: Comment prefix.
+    @type comment: C{str}
+    """
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith(comment):
+            yield line
+
+
+def _offsets(sizes):
+    """\
+    Return edge offsets from edge sizes.
+
+    @param sizes: The edge sizes.
+    @type sizes: C{list} of C{int}
+    @rtype: C{numpy.ndarray}
+    """
+    offsets = numpy.zeros(len(sizes) + 1, dtype=numpy.int64)
+    offsets[1:] = numpy.cumsum(sizes)
+    return offsets
+
+
+def _hgr_header(lines):
+    """\
+    Parse the header line of an hMETIS file.
+
+    @param lines: The lines of the file.
+    @type lines: C{generator}
+    @return: The number of edges, the number of vertices, and whether edge
+             weights are given.
+    @rtype: C{int}, C{int}, C{bool}
+    @raise ValueError: The header is not valid.
+    """
+    try:
+        header = [int(token) for token in next(lines).split()]
+        assert len(header) in (2, 3)
+        fmt = header[2] if len(header) == 3 else 0
+        assert fmt in (0, 1, 10, 11)
+        assert header[0] >= 0 and header[1] >= 0
+    except (StopIteration, ValueError, AssertionError):
+        raise ValueError('invalid hMETIS header')
+    return header[0], header[1], fmt % 10 == 1
+
+
+def _hgr_chunks(lines, nedges, weighted, chunksize):
+    """\
+    Generate chunks of edges from the edge lines of an hMETIS file.
+    """
+    sizes, members, weights = [], [], []
+    for e in xrange(nedges):
+        try:
+            row = next(lines).split()
+            weights.append(float(row.pop(0)) if weighted else 1.0)
+            sizes.append(len(row))
+            members.extend(row)
+        except (StopIteration, IndexError, ValueError):
+            raise ValueError('invalid or missing hMETIS edge %d' % (e + 1))
+        if len(sizes) == chunksize or e == nedges - 1:
+            yield _offsets(sizes), numpy.array(members, dtype=numpy.int64), \
+                numpy.array(weights)
+            sizes, members, weights = [], [], []
+
+
+def read_hgr_chunks(source, chunksize=CHUNKSIZE):
+    """\
+    Read the edges of an hMETIS hypergraph file in chunks. Each chunk consists
+    of edge offsets into the member array (starting from zero), the member
+    vertex numbers (counting from one, as in the file), and the edge weights.
+    Vertex weights, if present, are skipped.
+
+    @param source: File name or file object.
+    @type source: C{str} or C{file}
+    @param chunksize: The maximum number of edges in a chunk.
+    @type chunksize: C{int}
+    @return: Generator of edge offsets, members, and weights.
+    @rtype: C{generator} of C{tuple} of C{numpy.ndarray}
+    @raise ValueError: The file is not valid.
+    """
+    with _open(source) as f:
+        lines = _lines(f, '%')
+        nedges, nvertices, weighted = _hgr_header(lines)
+        for chunk in _hgr_chunks(lines, nedges, weighted, chunksize):
+            yield chunk
+
+
+def read_hgr(source, directed=False, frozen=False, chunksize=CHUNKSIZE):
+    """\
+    Read a hypergraph from an hMETIS hypergraph file. Vertices are the vertex
+    numbers of the file (counting from one). Vertex weights, if present, are
+    skipped.
+
+        - G. Karypis and V. Kumar, "hMETIS: A Hypergraph Partitioning Package,
+          Version 1.5.3," University of Minnesota, 1998.
+
+    @param source: File name or file object.
+    @type source: C{str} or C{file}
+    @param directed: Read a directed hypergraph (last vertex is the head).
+    @type directed: C{bool}
+    @param frozen: Return a L{FrozenHypergraph} instead of a L{Hypergraph}.
+    @type frozen: C{bool}
+    @param chunksize: The number of edges read at a time.
+    @type chunksize: C{int}
+    @return: The hypergraph.
+    @rtype: L{Hypergraph} or L{FrozenHypergraph}
+    @raise ValueError: The file is not valid.
+    """
+    with _open(source) as f:
+        lines = _lines(f, '%')
+        nedges, nvertices, weighted = _hgr_header(lines)
+        offsets, members, weights = _concatenate(_hgr_chunks(lines, nedges,
+            weighted, chunksize))
+    return _build(range(1, nvertices + 1), offsets, members - 1, weights,
+        directed, frozen)
+
+
+def read_edge_list_chunks(source, weighted=False, vertex_type=str,
+                          chunksize=CHUNKSIZE):
+    """\
+    Read the edges of an edge list file in chunks. Each line holds the vertices
+    of one edge, separated by whitespace, followed by the weight of the edge if
+    weighted. Lines starting with # are comments. Each chunk consists of edge
+    offsets into the member list (starting from zero), the member vertices, and
+    the edge weights.
+
+    @param source: File name or file object.
+    @type source: C{str} or C{file}
+    @param weighted: The last value on each line is the edge weight.
+    @type weighted: C{bool}
+    @param vertex_type: Conversion from string to vertex object.
+    @type vertex_type: C{type}
+    @param chunksize: The maximum number of edges in a chunk.
+    @type chunksize: C{int}
+    @return: Generator of edge offsets, members, and weights.
+    @rtype: C{generator} of C{tuple} of C{numpy.ndarray}, C{list},
+            C{numpy.ndarray}
+    @raise ValueError: The file is not valid.
+    """
+    with _open(source) as f:
+        sizes, members, weights = [], [], []
+        for line in _lines(f, '#'):
+            row = line.split()
+            try:
+                weights.append(float(row.pop()) if weighted else 1.0)
+                sizes.append(len(row))
+                members.extend([vertex_type(token) for token in row])
+            except (IndexError, ValueError):
+                raise ValueError('invalid edge list line %r' % line)
+            if len(sizes) == chunksize:
+                yield _offsets(sizes), members, numpy.array(weights)
+                sizes, members, weights = [], [], []
+        if sizes:
+            yield _offsets(sizes), members, numpy.array(weights)
+
+
+def read_edge_list(source, weighted=False, directed=False, vertex_type=str,
+                   frozen=False, chunksize=CHUNKSIZE):
+    """\
+    Read a hypergraph from an edge list file (see L{read_edge_list_chunks}).
+    Vertices are numbered in sorted order, as by L{Hypergraph.from_edge_list}.
+
+    @param source: File name or file object.
+    @type source: C{str} or C{file}
+    @param weighted: The last value on each line is the edge weight.
+    @type weighted: C{bool}
+    @param directed: Read a directed hypergraph (last vertex is the head).
+    @type directed: C{bool}
+    @param vertex_type: Conversion from string to vertex object.
+    @type vertex_type: C{type}
+    @param frozen: Return a L{FrozenHypergraph} instead of a L{Hypergraph}.
+    @type frozen: C{bool}
+    @param chunksize: The number of edges read at a time.
+    @type chunksize: C{int}
+    @return: The hypergraph.
+    @rtype: L{Hypergraph} or L{FrozenHypergraph}
+    @raise ValueError: The file is not valid.
+    """
+    index = VertexIndex()
+    def chunks():
+        for offsets, members, weights in read_edge_list_chunks(source,
+            weighted, vertex_type, chunksize):
+            index.extend(members)
+            yield offsets, index.ids(members), weights
+    offsets, members, weights = _concatenate(chunks())
+    labels = VertexIndex.ordered(index.labels)
+    order = numpy.empty(len(labels), dtype=numpy.int64)
+    order[index.ids(labels)] = numpy.arange(len(labels))
+    return _build(labels, offsets, order[members], weights, directed, frozen)
+
+
+def _concatenate(chunks):
+    """\
+    Concatenate chunks of edge arrays.
+
+    @param chunks: Chunks of edge offsets, members, and weights.
+    @type chunks: C{generator}
+    @return: Edge offsets, members, and weights.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    sizes = [numpy.zeros(0, dtype=numpy.int64)]
+    members = [numpy.zeros(0, dtype=numpy.int64)]
+    weights = [numpy.zeros(0)]
+    for chunk in chunks:
+        sizes.append(numpy.diff(chunk[0]))
+        members.append(chunk[1])
+        weights.append(chunk[2])
+    return _offsets(numpy.concatenate(sizes)), numpy.concatenate(members), \
+        numpy.concatenate(weights)
+
+
+def _build(labels, offsets, members, weights, directed, frozen):
+    """\
+    Construct a hypergraph from edge arrays, taking the last member of each
+    edge as its head if directed.
+
+    @rtype: L{Hypergraph} or L{FrozenHypergraph}
+    @raise ValueError: The arrays do not describe a valid hypergraph.
+    """
+    heads = None
+    if directed:
+        if numpy.any(numpy.diff(offsets) < 1):
+            raise ValueError('invalid hypergraph arrays')
+        heads = members[offsets[1:] - 1]
+    if frozen:
+        if not directed:
+            heads = -numpy.ones(len(offsets) - 1, dtype=numpy.int64)
+        return FrozenHypergraph(labels, offsets, members, heads, weights,
+            directed=directed)
+    return Hypergraph.from_arrays(offsets, members, heads, weights, labels,
+        directed)
+
+
+def _rows(H, chunksize):
+    """\
+    Generate chunks of the edges of a frozen hypergraph as lists of vertex ids
+    (head last if directed) and weights.
+
+    @param H: The hypergraph.
+    @type H: L{FrozenHypergraph}
+    @param chunksize: The maximum number of edges in a chunk.
+    @type chunksize: C{int}
+    """
+    offsets, members = H.edge_offsets, H.edge_members
+    heads, weights = H.heads, H.edge_weights
+    for start in xrange(0, len(weights), chunksize):
+        rows = []
+        for e in xrange(start, min(start + chunksize, len(weights))):
+            row = members[offsets[e]:offsets[e + 1]].tolist()
+            if heads[e] >= 0:
+                row.remove(heads[e])
+                row.append(int(heads[e]))
+            rows.append((row, float(weights[e])))
+        yield rows
+
+
+def _format_weight(weight):
+    """\
+    Format an edge weight, as an integer if it is integral.
+
+    @param weight: The weight.
+    @type weight: C{float}
+    @rtype: C{str}
+    """
+    return '%d' % weight if weight.is_integer() else repr(weight)
+
+
+def write_hgr(H, target, chunksize=CHUNKSIZE):
+    """\
+    Write a hypergraph to an hMETIS hypergraph file. Vertices are numbered from
+    one in the order of the vertex index of the hypergraph. Edge weights are
+    written only if some weight is not 1.
+
+    @param H: The hypergraph.
+    @type H: L{Hypergraph} or L{FrozenHypergraph}
+    @param target: File name or file object.
+    @type target: C{str} or C{file}
+    @param chunksize: The number of edges written at a time.
+    @type chunksize: C{int}
+    """
+    if not isinstance(H, FrozenHypergraph):
+        H = H.freeze()
+    weighted = bool(numpy.any(H.edge_weights != 1.0))
+    with _open(target, 'wb') as f:
+        f.write('%d %d%s\n' % (len(H.edge_weights), len(H.labels),
+            ' 1' if weighted else ''))
+        for rows in _rows(H, chunksize):
+            f.write(''.join(['%s%s\n' % (_format_weight(weight) + ' ' \
+                if weighted else '', ' '.join([str(i + 1) for i in row])) \
+                for row, weight in rows]))
+
+
+def write_edge_list(H, target, weighted=False, chunksize=CHUNKSIZE):
+    """\
+    Write a hypergraph to an edge list file (see L{read_edge_list_chunks}).
+    Vertices are written as strings, and so should not contain whitespace.
+
+    @param H: The hypergraph.
+    @type H: L{Hypergraph} or L{FrozenHypergraph}
+    @param target: File name or file object.
+    @type target: C{str} or C{file}
+    @param weighted: Write the weight of each edge at the end of its line.
+    @type weighted: C{bool}
+    @param chunksize: The number of edges written at a time.
+    @type chunksize: C{int}
+    """
+    if not isinstance(H, FrozenHypergraph):
+        H = H.freeze()
+    labels = H.labels
+    with _open(target, 'wb') as f:
+        for rows in _rows(H, chunksize):
+            f.write(''.join(['%s%s\n' % (' '.join([str(labels[i]) \
+                for i in row]), ' ' + _format_weight(weight) if weighted \
+                else '') for row, weight in rows]))
+
+
+def _label_table(labels):
+    """\
+    Encode vertex labels for the binary format: as an integer array if they are
+    all integers, as concatenated strings with offsets if they are all strings
+    of one type, and otherwise pickled.
+
+    @param labels: The vertex labels.
+    @type labels: C{tuple}
+    @return: Label kind, label data, and label offsets.
+    @rtype: C{int}, C{numpy.ndarray}, C{numpy.ndarray}
+    """
+    offsets = numpy.zeros(0, dtype='<i8')
+    if all([type(v) in (int, long) and -2 ** 63 <= v < 2 ** 63 \
+        for v in labels]):
+        return _INTEGER, numpy.array(labels, dtype='<i8'), offsets
+    for kind, cls in [(_BYTES, str), (_UNICODE, unicode)]:
+        if all([type(v) is cls for v in labels]):
+            encoded = [v.encode('utf-8') if cls is unicode else v \
+                for v in labels]
+            return kind, numpy.fromstring(''.join(encoded), dtype=numpy.uint8),\
+                _offsets([len(v) for v in encoded]).astype('<i8')
+    return _PICKLE, numpy.fromstring(dumps(tuple(labels), HIGHEST_PROTOCOL),
+        dtype=numpy.uint8), offsets
+
+
+class _StringTable(object):
+    """\
+    Sequence of strings decoded on demand from a binary label section.
+    """
+    def __init__(self, data, offsets, kind):
+        self._data = data
+        self._offsets = offsets
+        self._kind = kind
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        value = self._data[self._offsets[i]:self._offsets[i + 1]].tostring()
+        return value.decode('utf-8') if self._kind == _UNICODE else value
+
+    def __iter__(self):
+        data = self._data.tostring()
+        offsets = self._offsets.tolist()
+        for i in xrange(len(offsets) - 1):
+            value = data[offsets[i]:offsets[i + 1]]
+            yield value.decode('utf-8') if self._kind == _UNICODE else value
+
+
+def write_binary(H, target):
+    """\
+    Write a hypergraph to a file in the binary format, which is read by
+    L{read_binary}. Vertex labels are stored as integers or strings if they are
+    all of one such type, and are otherwise pickled.
+
+    @param H: The hypergraph.
+    @type H: L{Hypergraph} or L{FrozenHypergraph}
+    @param target: File name or file object (at the start of the file).
+    @type target: C{str} or C{file}
+    """
+    if not isinstance(H, FrozenHypergraph):
+        H = H.freeze()
+    kind, labels, label_offsets = _label_table(H.labels)
+    arrays = [H.edge_offsets.astype('<i8'), H.edge_members.astype('<i8'),
+        H.heads.astype('<i8'), H.edge_weights.astype('<f8'),
+        H.vertex_offsets.astype('<i8'), H.vertex_edges.astype('<i8'), labels,
+        label_offsets]
+    sections, position = [], _HEADER.size
+    for array in arrays:
+        position += -position % _ALIGN
+        sections.extend([position, array.nbytes])
+        position += array.nbytes
+    header = _HEADER.pack(_MAGIC, _VERSION, int(H.directed), kind, 0,
+        len(H.labels), len(H.edge_weights), len(H.edge_members), *sections)
+    if hasattr(target, 'write'):
+        f = target
+    else:
+        f = open(target, 'wb')
+    try:
+        f.write(header)
+        position = _HEADER.size
+        for offset, array in zip(sections[::2], arrays):
+            f.write('\0' * (offset - position))
+            f.write(array.tostring())
+            position = offset + array.nbytes
+    finally:
+        if f is not target:
+            f.close()
+
+
+def read_binary(source, mmap=True, validate=True, allow_pickle=False):
+    """\
+    Read a hypergraph from a file in the binary format written by
+    L{write_binary}. With memory mapping, the arrays of the hypergraph are
+    read-only views of the file, so loading takes time independent of its size
+    and processes reading the same file share memory; vertex labels and other
+    objects are built on first use.
+
+    Pickled vertex labels are refused unless allowed, since unpickling data
+    from an untrusted file can execute arbitrary code.
+
+    @param source: File name.
+    @type source: C{str}
+    @param mmap: Map the file into memory instead of reading it.
+    @type mmap: C{bool}
+    @param validate: Check the arrays of the hypergraph (see
+                     L{FrozenHypergraph}); this may be skipped for trusted
+                     files.
+    @type validate: C{bool}
+    @param allow_pickle: Load pickled vertex labels.
+    @type allow_pickle: C{bool}
+    @return: The hypergraph.
+    @rtype: L{FrozenHypergraph}
+    @raise ValueError: The file is not valid, or it has pickled vertex labels
+                       and these are not allowed.
+    """
+    if mmap:
+        data = numpy.memmap(source, dtype=numpy.uint8, mode='r')
+    else:
+        data = numpy.fromfile(source, dtype=numpy.uint8)
+        data.flags.writeable = False
+    try:
+        assert len(data) >= _HEADER.size
+        header = _HEADER.unpack(data[:_HEADER.size].tostring())
+        assert header[0] == _MAGIC
+    except AssertionError:
+        raise ValueError('not a binary hypergraph file')
+    if header[1] != _VERSION:
+        raise ValueError('unsupported binary hypergraph version %d' % header[1])
+    directed, kind = bool(header[2] & 1), header[3]
+    nvertices, nedges, nmembers = header[5:8]
+    arrays = {}
+    dtypes = ['<i8', '<i8', '<i8', '<f8', '<i8', '<i8',
+        '<i8' if kind == _INTEGER else numpy.uint8, '<i8']
+    counts = [nedges + 1, nmembers, nedges, nedges, nvertices + 1, nmembers,
+        nvertices if kind == _INTEGER else None,
+        nvertices + 1 if kind in (_BYTES, _UNICODE) else 0]
+    try:
+        for i, name in enumerate(_SECTIONS):
+            offset, size = header[8 + 2 * i:10 + 2 * i]
+            assert 0 <= offset and offset + size <= len(data)
+            arrays[name] = data[offset:offset + size].view(dtypes[i])
+            assert counts[i] is None or len(arrays[name]) == counts[i]
+        assert kind in (_INTEGER, _BYTES, _UNICODE, _PICKLE)
+    except (AssertionError, ValueError):
+        raise ValueError('corrupt binary hypergraph file')
+    if kind == _INTEGER:
+        labels = arrays['labels']
+    elif kind == _PICKLE:
+        if not allow_pickle:
+            raise ValueError('cannot load pickled vertex labels when '
+                'allow_pickle=False')
+        labels = loads(arrays['labels'].tostring())
+    else:
+        labels = _StringTable(arrays['labels'], arrays['label_offsets'], kind)
+    return FrozenHypergraph(labels, arrays['edge_offsets'],
+        arrays['edge_members'], arrays['heads'], arrays['weights'],
+        directed=directed, vertex_offsets=arrays['vertex_offsets'],
+        vertex_edges=arrays['vertex_edges'], validate=validate)
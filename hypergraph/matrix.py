@@ -1,6 +1,10 @@
 """\
 Hypergraph - matrix functions, algebraic and spectral graph theory.
 
+Each matrix function returns a dense C{numpy.ndarray} by default, or a
+C{scipy.sparse} CSR matrix if the sparse parameter is set (this requires SciPy).
+Rows and columns follow the orders given by L{vertex_order} and L{edge_order}.
+
 @author: Aaron Mavrinac
 @organization: University of Windsor
 @contact: mavrin1@uwindsor.ca
@@ -10,20 +14,95 @@ Hypergraph - matrix functions, algebraic and spectral graph theory.
 import numpy
 
 
-def degree_matrix(H):
+def vertex_order(H):
+    """\
+    Return the vertices of a hypergraph in matrix row/column order, which is
+    the id order of its L{vertex_index<hypergraph.core.Hypergraph.vertex_index>}
+    (sorted, unless vertices have since been added or removed).
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @return: The ordered vertices.
+    @rtype: C{list}
+    """
+    return list(H.vertex_index.labels)
+
+
+def edge_order(H):
+    """\
+    Return the edges of a hypergraph in incidence matrix column order (sorted
+    by the positions of their vertices in L{vertex_order}, then by head).
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @return: The ordered edges.
+    @rtype: C{list} of L{Edge}
+    """
+    return _orders(H)[2]
+
+
+def _orders(H):
+    """\
+    Return the vertex order, the vertex index, and the edge order.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @rtype: C{list}, L{VertexIndex<hypergraph.core.VertexIndex>}, C{list}
+    """
+    V = vertex_order(H)
+    index = H.vertex_index
+    E = sorted(H.edges, key=lambda edge: (sorted([index[v] for v in edge]),
+        index[edge.head] if edge.head is not None else -1))
+    return V, index, E
+
+
+def _incidence_entries(H, index, E):
+    """\
+    Return the coordinates of the head and tail entries of the incidence
+    matrix. In an undirected hypergraph, every vertex is a tail vertex.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @param index: Vertex index.
+    @type index: L{VertexIndex<hypergraph.core.VertexIndex>}
+    @param E: Edge order.
+    @type E: C{list} of L{Edge}
+    @return: Row and column indices of head entries, then of tail entries.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    hrows, hcols, trows, tcols = [], [], [], []
+    for e, edge in enumerate(E):
+        if edge.head is not None:
+            hrows.append(index[edge.head])
+            hcols.append(e)
+        for v in edge:
+            if v != edge.head:
+                trows.append(index[v])
+                tcols.append(e)
+    return tuple(numpy.array(a, dtype=int) \
+        for a in (hrows, hcols, trows, tcols))
+
+
+def degree_matrix(H, sparse=False):
     """\
     Return the degree matrix of a hypergraph. For directed hypergraphs,
     considers the indegree.
 
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
+    @param sparse: Return a sparse matrix.
+    @type sparse: C{bool}
     @return: The degree matrix.
-    @rtype: C{numpy.ndarray}
+    @rtype: C{numpy.ndarray} or C{scipy.sparse.csr_matrix}
     """
-    return numpy.diag([H.indegree(v) for v in sorted(list(H.vertices))])
+    degrees = [H.indegree(v) for v in vertex_order(H)]
+    if sparse:
+        import scipy.sparse
+        return scipy.sparse.diags([degrees], [0], format='csr')
+    return numpy.diag(degrees)
 
 
-def adjacency_matrix(H):
+def adjacency_matrix(H, sparse=False, weighted=True):
     """\
     Return the adjacency matrix of a hypergraph. For directed hypergraphs,
     considers the indegree adjacency (the column index is associated with the
@@ -31,46 +110,74 @@ def adjacency_matrix(H):
 
     @param H: The input graph.
     @type H: L{Hypergraph}
+    @param sparse: Return a sparse matrix.
+    @type sparse: C{bool}
+    @param weighted: Use edge weights (otherwise, count edges).
+    @type weighted: C{bool}
     @return: The adjacency matrix.
-    @rtype: C{numpy.ndarray}
+    @rtype: C{numpy.ndarray} or C{scipy.sparse.csr_matrix}
     """
-    V = sorted(list(H.vertices))
+    V, index, E = _orders(H)
+    weights = numpy.array([H.weights[edge] if weighted else 1.0 \
+        for edge in E], dtype=float)
+    hrows, hcols, trows, tcols = _incidence_entries(H, index, E)
+    if sparse:
+        import scipy.sparse
+        shape = (len(V), len(E))
+        T = scipy.sparse.csr_matrix((weights[tcols], (trows, tcols)), shape)
+        if H.directed:
+            B = scipy.sparse.csr_matrix((numpy.ones(len(hrows)),
+                (hrows, hcols)), shape)
+            return T.dot(B.T).tocsr()
+        B = scipy.sparse.csr_matrix((numpy.ones(len(trows)),
+            (trows, tcols)), shape)
+        adjacency = T.dot(B.T)
+        adjacency = (adjacency - scipy.sparse.diags([adjacency.diagonal()],
+            [0])).tocsr()
+        adjacency.eliminate_zeros()
+        return adjacency
     adjacency = numpy.zeros((len(V), len(V)))
-    for u in range(len(V)):
-        for v in range(len(V)):
-            adjacency[u][v] = sum([H.weights[edge] \
-                for edge in H.reachable(V[u], V[v])])
+    if H.directed:
+        numpy.add.at(adjacency, (trows, hrows[tcols]), weights[tcols])
+    else:
+        for e, edge in enumerate(E):
+            ids = [index[v] for v in edge]
+            for i in ids:
+                for j in ids:
+                    if i != j:
+                        adjacency[i, j] += weights[e]
     return adjacency
 
 
-def incidence_matrix(H):
+def incidence_matrix(H, sparse=False):
     """\
-    Return the incidence matrix of a hypergraph.
+    Return the incidence matrix of a hypergraph. For directed hypergraphs, head
+    entries are 1 and tail entries are -1.
 
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
-    @return: The adjacency matrix.
-    @rtype: C{numpy.ndarray}
+    @param sparse: Return a sparse matrix.
+    @type sparse: C{bool}
+    @return: The incidence matrix.
+    @rtype: C{numpy.ndarray} or C{scipy.sparse.csr_matrix}
     """
-    V = sorted(list(H.vertices))
-    E = sorted(list(H.edges))
-    dV = {}
-    for i in range(len(V)):
-        dV[V[i]] = i
-    incidence = numpy.zeros((len(V), len(E)))
+    V, index, E = _orders(H)
+    hrows, hcols, trows, tcols = _incidence_entries(H, index, E)
+    rows = numpy.concatenate((hrows, trows))
+    cols = numpy.concatenate((hcols, tcols))
+    values = numpy.ones(len(rows))
     if H.directed:
-        for e in range(len(E)):
-            incidence[dV[E[e].head]][e] = 1
-            for v in E[e].tail:
-                incidence[dV[v]][e] = -1
-    else:
-        for e in range(len(E)):
-            for v in E[e]:
-                incidence[dV[v]][e] = 1
+        values[len(hrows):] = -1
+    if sparse:
+        import scipy.sparse
+        return scipy.sparse.csr_matrix((values, (rows, cols)),
+            (len(V), len(E)))
+    incidence = numpy.zeros((len(V), len(E)))
+    incidence[rows, cols] = values
     return incidence
 
 
-def laplacian_matrix(H):
+def laplacian_matrix(H, sparse=False, weighted=True):
     """\
     Return the Laplacian matrix of a hypergraph.
 
@@ -84,10 +191,18 @@ def laplacian_matrix(H):
 
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
+    @param sparse: Return a sparse matrix.
+    @type sparse: C{bool}
+    @param weighted: Use edge weights (otherwise, count edges).
+    @type weighted: C{bool}
     @return: The Laplacian matrix.
-    @rtype: C{numpy.ndarray}
+    @rtype: C{numpy.ndarray} or C{scipy.sparse.csr_matrix}
     """
-    A = adjacency_matrix(H)
+    A = adjacency_matrix(H, sparse=sparse, weighted=weighted)
+    if sparse:
+        import scipy.sparse
+        return (scipy.sparse.diags([numpy.asarray(A.sum(axis=0)).ravel()],
+            [0]) - A).tocsr()
     return numpy.diag(numpy.sum(A, axis=0)) - A
 
 
@@ -96,8 +211,258 @@ def laplacian_eigenvalues(L):
     Return the eigenvalues of a hypergraph Laplacian in ascending order.
 
     @param L: The hypergraph Laplacian.
-    @type L: C{numpy.ndarray}
+    @type L: C{numpy.ndarray} or C{scipy.sparse.spmatrix}
     @return: The eigenvalues of L.
     @rtype: C{list} of C{float}
     """
+    if not isinstance(L, numpy.ndarray):
+        L = L.toarray()
     return sorted(numpy.linalg.eigvalsh(L))
+
+
+DENSE_LIMIT = 256
+SHIFT = 1e-12
+
+
+class ConvergenceError(RuntimeError):
+    """\
+    Iterative eigensolver convergence error.
+    """
+
+
+def smallest_laplacian_eigenpairs(L, k=2, tol=0.0, method='lanczos',
+                                  maxiter=1000):
+    """\
+    Return the k smallest eigenvalues of a hypergraph Laplacian and their
+    eigenvectors, without computing the full spectrum. Sparse Laplacians are
+    handled by the implicitly restarted Lanczos method of ARPACK or by LOBPCG
+    with a Jacobi preconditioner (this requires SciPy); Laplacians with at most
+    L{DENSE_LIMIT} rows, or too few rows for the iterative solver, are solved
+    densely.
+
+    If the indicator vectors of the connected components are null vectors of
+    L, as they are of every Laplacian, they are deflated and returned as the
+    first eigenvectors. Lanczos runs in shift-invert mode, on a sparse
+    factorization of L shifted just below zero (by L{SHIFT} times the largest
+    diagonal entry), so that the smallest eigenvalues are the best separated
+    ones of the operator. LOBPCG results are only accepted if their residual
+    norms are within the tolerance relative to the largest diagonal entry (for
+    a tolerance of 0, the square root of machine precision).
+
+    @param L: The (symmetric) hypergraph Laplacian.
+    @type L: C{numpy.ndarray} or C{scipy.sparse.spmatrix}
+    @param k: The number of eigenpairs.
+    @type k: C{int}
+    @param tol: Relative accuracy of the eigenvalues (0 for machine
+                precision).
+    @type tol: C{float}
+    @param method: The iterative solver, 'lanczos' or 'lobpcg'.
+    @type method: C{str}
+    @param maxiter: Maximum number of iterations (restarts, for Lanczos).
+    @type maxiter: C{int}
+    @return: The eigenvalues in ascending order, and the corresponding unit
+             eigenvectors as columns.
+    @rtype: C{numpy.ndarray}, C{numpy.ndarray}
+    @raise ValueError: The number of eigenpairs or the method is invalid.
+    @raise ConvergenceError: The iterative solver did not converge.
+    """
+    n = L.shape[0]
+    try:
+        assert 0 < k <= n
+    except AssertionError:
+        raise ValueError('number of eigenpairs must be between 1 and %d' % n)
+    try:
+        assert method in ('lanczos', 'lobpcg')
+    except AssertionError:
+        raise ValueError('unknown method %r' % method)
+    if n <= DENSE_LIMIT or k >= n - 1 or (method == 'lobpcg' and 5 * k > n):
+        if not isinstance(L, numpy.ndarray):
+            L = L.toarray()
+        eigenvalues, eigenvectors = numpy.linalg.eigh(L)
+        return eigenvalues[:k], eigenvectors[:, :k]
+    import scipy.sparse
+    L = scipy.sparse.csr_matrix(L, dtype=float)
+    scale = max(abs(L.diagonal()).max(), 1.0)
+    deflated = _null_vectors(L, k, scale)
+    start = numpy.random.RandomState(0).rand(n, k - deflated.shape[1])
+    start -= deflated.dot(deflated.T.dot(start))
+    if not start.shape[1]:
+        eigenvectors = deflated
+    elif method == 'lanczos':
+        eigenvectors = _lanczos(L, start, deflated, scale, tol, maxiter)
+    else:
+        eigenvectors = _lobpcg(L, start, deflated,
+            (tol or numpy.sqrt(numpy.finfo(float).eps)) * scale, maxiter)
+    eigenvalues = numpy.sum(eigenvectors * L.dot(eigenvectors), axis=0)
+    order = numpy.argsort(eigenvalues)
+    return eigenvalues[order], eigenvectors[:, order]
+
+
+def _null_vectors(L, k, scale):
+    """\
+    Return the normalized indicator vectors of the connected components of a
+    sparse Laplacian (at most k of them, if there are at least k), if they are
+    null vectors of it, and otherwise no vectors.
+
+    @param L: The hypergraph Laplacian.
+    @type L: C{scipy.sparse.csr_matrix}
+    @param k: The number of eigenpairs.
+    @type k: C{int}
+    @param scale: The largest diagonal entry of L (at least 1).
+    @type scale: C{float}
+    @return: The null vectors, as columns.
+    @rtype: C{numpy.ndarray}
+    """
+    import scipy.sparse
+    from scipy.sparse.csgraph import connected_components
+    n = L.shape[0]
+    count, labels = connected_components(L, directed=False)
+    if count >= k:
+        count = k
+        rows = numpy.flatnonzero(labels < k)
+    else:
+        rows = numpy.arange(n)
+    vectors = scipy.sparse.csr_matrix((numpy.ones(len(rows)),
+        (rows, labels[rows])), (n, count)).toarray()
+    vectors /= numpy.sqrt(vectors.sum(axis=0))
+    if abs(L.dot(vectors)).max() > numpy.sqrt(numpy.finfo(float).eps) * scale:
+        return numpy.zeros((n, 0))
+    return vectors
+
+
+def _lanczos(L, start, deflated, scale, tol, maxiter):
+    """\
+    Find the eigenvectors for the smallest eigenvalues of a sparse Laplacian,
+    in the complement of the deflated vectors, by the Lanczos method in
+    shift-invert mode (see L{smallest_laplacian_eigenpairs}).
+
+    @param L: The hypergraph Laplacian.
+    @type L: C{scipy.sparse.csr_matrix}
+    @param start: Initial vectors, one for each eigenpair.
+    @type start: C{numpy.ndarray}
+    @param deflated: Orthonormal null vectors to deflate, as columns.
+    @type deflated: C{numpy.ndarray}
+    @param scale: The largest diagonal entry of L (at least 1).
+    @type scale: C{float}
+    @param tol: Relative accuracy (0 for machine precision).
+    @type tol: C{float}
+    @param maxiter: Maximum number of restarts.
+    @type maxiter: C{int}
+    @return: The eigenvectors.
+    @rtype: C{numpy.ndarray}
+    @raise ConvergenceError: The method did not converge.
+    """
+    import scipy.sparse
+    from scipy.sparse.linalg import eigsh, splu, LinearOperator, \
+        ArpackNoConvergence
+    n = L.shape[0]
+    factor = splu((L + SHIFT * scale * scipy.sparse.identity(n)).tocsc())
+    def project(x):
+        x = numpy.ravel(x)
+        return x - deflated.dot(deflated.T.dot(x))
+    operator = LinearOperator((n, n), dtype=float,
+        matvec=lambda x: project(factor.solve(project(x))))
+    try:
+        theta, eigenvectors = eigsh(operator, start.shape[1], which='LA',
+            v0=start[:, 0], tol=tol, maxiter=maxiter)
+    except ArpackNoConvergence:
+        raise ConvergenceError('Lanczos method did not converge in %d '
+            'restarts' % maxiter)
+    return numpy.hstack((deflated, eigenvectors))
+
+
+def _lobpcg(L, start, deflated, tol, maxiter):
+    """\
+    Find the eigenvectors for the smallest eigenvalues of a sparse Laplacian,
+    in the complement of the deflated vectors, by LOBPCG with a Jacobi
+    preconditioner.
+
+    @param L: The hypergraph Laplacian.
+    @type L: C{scipy.sparse.csr_matrix}
+    @param start: Initial vectors, one for each eigenpair.
+    @type start: C{numpy.ndarray}
+    @param deflated: Orthonormal null vectors to deflate, as columns.
+    @type deflated: C{numpy.ndarray}
+    @param tol: Maximum residual norm.
+    @type tol: C{float}
+    @param maxiter: Maximum number of iterations.
+    @type maxiter: C{int}
+    @return: The eigenvectors.
+    @rtype: C{numpy.ndarray}
+    @raise ConvergenceError: A residual norm exceeds the tolerance.
+    """
+    import scipy.sparse
+    from scipy.sparse.linalg import lobpcg
+    diagonal = L.diagonal()
+    diagonal[diagonal == 0] = 1.0
+    M = scipy.sparse.diags([1.0 / diagonal], [0])
+    eigenvalues, eigenvectors = lobpcg(L, start, M=M,
+        Y=deflated if deflated.shape[1] else None, tol=tol, maxiter=maxiter,
+        largest=False)
+    residuals = numpy.linalg.norm(L.dot(eigenvectors) \
+        - eigenvectors * eigenvalues, axis=0)
+    if residuals.max() > tol:
+        raise ConvergenceError('LOBPCG did not converge in %d iterations '
+            '(residual norm %g)' % (maxiter, residuals.max()))
+    return numpy.hstack((deflated, eigenvectors))
+
+
+def algebraic_connectivity(H, tol=0.0, method='lanczos'):
+    """\
+    Return the algebraic connectivity of an undirected hypergraph, the second
+    smallest eigenvalue of its Laplacian (zero if it has fewer than two
+    vertices).
+
+    @param H: The input undirected hypergraph.
+    @type H: L{Hypergraph}
+    @param tol: Relative accuracy (0 for machine precision).
+    @type tol: C{float}
+    @param method: The iterative solver, 'lanczos' or 'lobpcg'.
+    @type method: C{str}
+    @return: The algebraic connectivity.
+    @rtype: C{float}
+    @raise ValueError: The hypergraph is not undirected.
+    """
+    try:
+        assert not H.directed
+    except AssertionError:
+        raise ValueError('function only applies to undirected hypergraphs')
+    if len(H.vertices) < 2:
+        return 0.0
+    eigenvalues, eigenvectors = smallest_laplacian_eigenpairs(
+        laplacian_matrix(H, sparse=True), 2, tol, method)
+    return float(eigenvalues[1])
+
+
+def fiedler_vector(H, tol=0.0, method='lanczos'):
+    """\
+    Return a Fiedler vector of an undirected hypergraph with at least two
+    vertices, a unit eigenvector for the second smallest eigenvalue of its
+    Laplacian, in L{vertex_order}. Its sign is chosen so that the entry of
+    largest magnitude is positive.
+
+    @param H: The input undirected hypergraph.
+    @type H: L{Hypergraph}
+    @param tol: Relative accuracy (0 for machine precision).
+    @type tol: C{float}
+    @param method: The iterative solver, 'lanczos' or 'lobpcg'.
+    @type method: C{str}
+    @return: The Fiedler vector.
+    @rtype: C{numpy.ndarray}
+    @raise ValueError: The hypergraph is not undirected or has fewer than two
+                       vertices.
+    """
+    try:
+        assert not H.directed
+    except AssertionError:
+        raise ValueError('function only applies to undirected hypergraphs')
+    try:
+        assert len(H.vertices) >= 2
+    except AssertionError:
+        raise ValueError('hypergraph has fewer than two vertices')
+    eigenvalues, eigenvectors = smallest_laplacian_eigenpairs(
+        laplacian_matrix(H, sparse=True), 2, tol, method)
+    vector = eigenvectors[:, 1]
+    if vector[numpy.argmax(abs(vector))] < 0:
+        vector = -vector
+    return vector
@@ -7,29 +7,75 @@ Hypergraph - orientation algorithms.
 @license: LGPL-3
 """
 
-from random import sample
-from copy import copy
+from collections import deque, namedtuple
+from heapq import heapify, heappush, heappop
+from itertools import count
+from multiprocessing import Pool
+from random import Random, choice
+from time import time
 
-from .core import Hypergraph, Edge
+from .core import Hypergraph
+from .matrix import edge_order
 
 
-def random_orientation(H):
+def random_orientation(H, rng=None):
     """\
     Return a random orientation of a hypergraph.
 
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
+    @param rng: Random number generator (optional).
+    @type rng: C{random.Random}
     @return: A random orientation of the hypergraph.
     @rtype: L{Hypergraph}
     """
-    L = Hypergraph(vertices=H.vertices, directed=True)
-    for edge in H.edges:
-        L.add_edge(Edge(edge, head=sample(edge, 1)[0]))
-    L.weights = copy(H.weights)
-    return L
+    pick = choice if rng is None else rng.choice
+    index = H.vertex_index
+    E, members = _members(H)
+    return _orientation(index, members, [pick(ids) for ids in members],
+        [H.weights[edge] for edge in E])
 
 
-def minimum_maximum_indegree_orientation(H):
+def _members(H):
+    """\
+    Return the edges of a hypergraph in L{edge_order}, and the sorted member
+    vertex ids of each, so that results do not depend on set iteration order.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @return: The edges and their member vertex ids.
+    @rtype: C{list} of L{Edge<hypergraph.core.Edge>}, C{list} of C{list} of
+            C{int}
+    """
+    index = H.vertex_index
+    E = edge_order(H)
+    return E, [sorted([index[v] for v in edge]) for edge in E]
+
+
+def _orientation(index, members, heads, weights=None):
+    """\
+    Construct an orientation from the vertex ids of the members and head of
+    each edge.
+
+    @param index: The vertex index of the hypergraph.
+    @type index: L{VertexIndex<hypergraph.core.VertexIndex>}
+    @param members: The member vertex ids of each edge.
+    @type members: C{list} of C{list} of C{int}
+    @param heads: The head vertex id of each edge.
+    @type heads: C{list} of C{int}
+    @param weights: The weight of each edge (optional).
+    @type weights: C{list} of C{float}
+    @return: The orientation.
+    @rtype: L{Hypergraph}
+    """
+    offsets = [0]
+    for ids in members:
+        offsets.append(offsets[-1] + len(ids))
+    return Hypergraph.from_arrays(offsets, [v for ids in members for v in ids],
+        heads, weights, index.labels, directed=True)
+
+
+def minimum_maximum_indegree_orientation(H, rng=None):
     """\
     Find a minimum maximum indegree orientation of an unweighted hypergraph.
     Adapted from a graph algorithm by Asahiro et al. for finding a minimum
@@ -38,51 +84,287 @@ def minimum_maximum_indegree_orientation(H):
         - Y. Asahiro, E. Miyano, H. Ono, and K. Zenmyo, "Graph Orientation
           Algorithms To Minimize the Maximum Outdegree," Int. J. Foundations of
           Computer Science, vol. 18, pp. 197-215, 2007.
+
+    Vertices and edges are numbered, indegrees are updated as edges are
+    reversed, and a vertex of maximum indegree is taken from a bucket queue.
     
     @param H: The input unweighted hypergraph.
     @type H: L{Hypergraph}
+    @param rng: Random number generator for the initial orientation
+                (optional).
+    @type rng: C{random.Random}
     @return: A minimum maximum indegree orientation of the hypergraph.
     @rtype: L{Hypergraph}
     """
-    def find_reducing_path(L, D, u):
-        marked = set([u])
-        Q = [(u, [])]
-        while Q:
-            v, path = Q.pop(0)
-            for edge in L.incident(v):
-                for w in edge:
-                    if w in marked:
+    index = H.vertex_index
+    E, members = _members(H)
+    n = len(index)
+    # generate an arbitrary orientation of H
+    pick = choice if rng is None else rng.choice
+    heads = [pick(ids) for ids in members]
+    headed = [set() for v in xrange(n)]
+    for e, v in enumerate(heads):
+        headed[v].add(e)
+    buckets = [set() for d in xrange(len(E) + 1)]
+    for v in xrange(n):
+        buckets[len(headed[v])].add(v)
+    dmax = max([len(headed[v]) for v in xrange(n)] or [0])
+    parent = [None] * n
+    marked = [-1] * n
+    for search in count():
+        while dmax and not buckets[dmax]:
+            dmax -= 1
+        if dmax < 2:
+            break
+        # find a directed path which can reduce the indegree of a vertex of
+        # maximum indegree
+        u = buckets[dmax].pop()
+        marked[u] = search
+        Q = deque([u])
+        end = None
+        while Q and end is None:
+            v = Q.popleft()
+            for e in headed[v]:
+                for w in members[e]:
+                    if marked[w] == search:
                         continue
-                    elif D[w] < D[u] - 1:
-                        return path + [(edge, w)]
-                    elif D[w] <= D[u]:
-                        marked.add(w)
-                        Q.append((w, path + [(edge, w)]))
-        return None
-
-    # generate L, an arbitrary orientation of H
-    L = Hypergraph(vertices=H.vertices, directed=True)
-    for edge in H.edges:
-        L.add_edge(Edge(edge, head=sample(edge, 1)[0]))
-    while True:
-        # compute the indegree of each vertex in L
-        degrees = dict((v, L.indegree(v, weighted=False)) for v in L.vertices)
-        # find the vertex with maximum indegree
-        degrees_rev = dict(map(lambda v: (v[1], v[0]), degrees.items()))
-        vmax = degrees_rev[max(degrees_rev.keys())]
-        # find a directed path which can reduce the degree of vmax
-        path = find_reducing_path(L, degrees, vmax)
-        # if no such path exists, return L
-        if not path:
+                    marked[w] = search
+                    parent[w] = e
+                    if len(headed[w]) < dmax - 1:
+                        end = w
+                        break
+                    Q.append(w)
+                if end is not None:
+                    break
+        # if no such path exists, the orientation is optimal
+        if end is None:
             break
         # otherwise, reverse the directed path and continue
-        for edge, vertex in path:
-            L.remove_edge(edge)
-            L.add_edge(Edge(edge, head=vertex))
-    return L
+        buckets[len(headed[end])].discard(end)
+        w = end
+        while w != u:
+            e = parent[w]
+            v = heads[e]
+            headed[v].discard(e)
+            headed[w].add(e)
+            heads[e] = w
+            w = v
+        for w in (u, end):
+            buckets[len(headed[w])].add(w)
+    return _orientation(index, members, heads)
+
+
+def flow_minimum_maximum_indegree_orientation(H):
+    """\
+    Find a minimum maximum indegree orientation of an unweighted hypergraph
+    exactly by maximum flow, together with a certificate of its optimality.
+
+    An orientation of maximum indegree at most k is a flow of value |E| in the
+    network with an arc of capacity 1 from a source to each edge, an arc of
+    unbounded capacity from each edge to each of its members, and an arc of
+    capacity k from each vertex to a sink. The flow is found by Dinic's
+    algorithm, specialised to this network so that the flow is the partial
+    assignment of heads to edges. The optimal bound is found by bisection
+    between the trivial lower bound ceil(|E|/|V|) and the maximum indegree of a
+    greedy assignment. Each bound is tried starting from the best orientation
+    found so far, with the edges in excess of the bound at each vertex
+    unassigned. Isolated vertices are left out of the network.
+
+        - E. A. Dinic, "Algorithm for Solution of a Problem of Maximum Flow in
+          a Network with Power Estimation," Soviet Math. Doklady, vol. 11,
+          pp. 1277-1280, 1970.
+
+    When the maximum flow for the bound k* - 1 is short of |E|, the vertices S
+    on the source side of a minimum cut span more than (k* - 1)|S| edges. The
+    head of each of those edges lies in S, so every orientation has a vertex of
+    indegree at least k*, and the returned orientation is optimal. The bound is
+    checked by L{indegree_lower_bound}.
+
+    @param H: The input unweighted hypergraph.
+    @type H: L{Hypergraph}
+    @return: A minimum maximum indegree orientation of the hypergraph, and a
+             set of vertices whose induced edges prove its optimality.
+    @rtype: L{Hypergraph}, C{frozenset}
+    """
+    index = H.vertex_index
+    E, members = _members(H)
+    n = len(index)
+    m = len(E)
+    if not m:
+        return _orientation(index, members, []), frozenset()
+    certificate = frozenset(index.labels)
+    # the flow network only involves vertices which are members of some edge
+    active = sorted(set(v for ids in members for v in ids))
+    local = dict((v, i) for i, v in enumerate(active))
+    compact = [[local[v] for v in ids] for ids in members]
+    # assign each edge greedily to its least loaded member
+    heads = [None] * m
+    load = [0] * len(active)
+    for e, ids in enumerate(compact):
+        v = min(ids, key=lambda w: load[w])
+        heads[e] = v
+        load[v] += 1
+    lower, upper = -(-m // n), max(load)
+    while lower < upper:
+        k = (lower + upper) // 2
+        trial = list(heads)
+        headed = [set() for v in active]
+        unassigned = []
+        for e, v in enumerate(trial):
+            if len(headed[v]) < k:
+                headed[v].add(e)
+            else:
+                trial[e] = None
+                unassigned.append(e)
+        reachable = _bounded_flow(compact, k, trial, headed, unassigned)
+        if reachable is None:
+            heads, upper = trial, k
+        else:
+            certificate = frozenset(index.labels[active[v]] for v in reachable)
+            lower = k + 1
+    return _orientation(index, members, [active[v] for v in heads]), \
+        certificate
+
+
+def _bounded_flow(members, k, heads, headed, unassigned):
+    """\
+    Extend a partial assignment of heads to edges, within an indegree bound, to
+    a maximum flow by Dinic's algorithm (see
+    L{flow_minimum_maximum_indegree_orientation}). The assignment is updated in
+    place.
+
+    @param members: The member vertex ids of each edge.
+    @type members: C{list} of C{list} of C{int}
+    @param k: The indegree bound.
+    @type k: C{int}
+    @param heads: The head vertex id of each edge, None if unassigned.
+    @type heads: C{list}
+    @param headed: The ids of the edges assigned to each vertex.
+    @type headed: C{list} of C{set}
+    @param unassigned: The ids of the unassigned edges.
+    @type unassigned: C{list} of C{int}
+    @return: None if every edge is assigned, and otherwise the vertex ids on
+             the source side of a minimum cut.
+    @rtype: C{list} of C{int}
+    """
+    m, n = len(members), len(headed)
+    while unassigned:
+        # build the level graph of the residual network from the unassigned
+        # edges, up to the first layer containing a vertex below the bound
+        elevel = [-1] * m
+        vlevel = [-1] * n
+        for e in unassigned:
+            elevel[e] = 0
+        frontier = unassigned
+        layers = []
+        depth = None
+        while frontier:
+            layer = []
+            for e in frontier:
+                for v in members[e]:
+                    if vlevel[v] < 0:
+                        vlevel[v] = len(layers)
+                        layer.append(v)
+            layers.append(layer)
+            if any(len(headed[v]) < k for v in layer):
+                depth = len(layers) - 1
+                break
+            frontier = []
+            for v in layer:
+                for e in headed[v]:
+                    if elevel[e] < 0:
+                        elevel[e] = len(layers)
+                        frontier.append(e)
+        if depth is None:
+            # the flow is maximum and short of |E|: the reachable vertices are
+            # the source side of a minimum cut
+            return [v for layer in layers for v in layer]
+        # find a blocking flow by depth-first search along the levels
+        eptr = [0] * m
+        adjacent = {}
+        remaining = []
+        for root in unassigned:
+            path = [root]
+            vertices = []
+            while path:
+                e = path[-1]
+                level = elevel[e]
+                ids = members[e]
+                v = None
+                while eptr[e] < len(ids):
+                    w = ids[eptr[e]]
+                    if vlevel[w] == level:
+                        v = w
+                        break
+                    eptr[e] += 1
+                if v is None:
+                    # dead end: remove the edge from the level graph
+                    elevel[e] = -1
+                    path.pop()
+                    if vertices:
+                        vertices.pop()
+                    continue
+                if level == depth:
+                    if len(headed[v]) < k:
+                        break
+                    vlevel[v] = -1
+                    eptr[e] += 1
+                    continue
+                if v not in adjacent:
+                    adjacent[v] = [f for f in headed[v]
+                        if elevel[f] == level + 1]
+                candidates = adjacent[v]
+                f = None
+                while candidates:
+                    f = candidates[-1]
+                    if heads[f] == v and elevel[f] == level + 1:
+                        break
+                    candidates.pop()
+                    f = None
+                if f is None:
+                    vlevel[v] = -1
+                    eptr[e] += 1
+                    continue
+                path.append(f)
+                vertices.append(v)
+            if not path:
+                remaining.append(root)
+                continue
+            # augment along the path, shifting each edge to the next vertex
+            vertices.append(v)
+            for e, v in zip(path, vertices):
+                if heads[e] is not None:
+                    headed[heads[e]].discard(e)
+                heads[e] = v
+                headed[v].add(e)
+        unassigned = remaining
+    return None
+
+
+def indegree_lower_bound(H, S):
+    """\
+    Return the lower bound on the maximum indegree of every orientation of an
+    unweighted hypergraph given by a set of its vertices: the head of each edge
+    with all members in the set is in the set, so some vertex of the set has
+    indegree at least the number of those edges divided by the size of the set.
+
+    @param H: The input unweighted hypergraph.
+    @type H: L{Hypergraph}
+    @param S: A set of vertices of the hypergraph.
+    @type S: C{set}
+    @return: The lower bound.
+    @rtype: C{int}
+    """
+    S = frozenset(S)
+    if not S:
+        return 0
+    edges = sum(1 for edge in H.edges if edge <= S)
+    return -(-edges // len(S))
 
 
-def minimum_maximum_weighted_indegree_orientation(H):
+def minimum_maximum_weighted_indegree_orientation(H, initial=None,
+                                                  time_limit=None,
+                                                  max_iterations=None):
     """\
     Approximate a minimum maximum weighted indegree orientation of a weighted
     hypergraph using a local search heuristic. Adapted from an algorithm by
@@ -93,62 +375,242 @@ def minimum_maximum_weighted_indegree_orientation(H):
           Parallel Machine Scheduling with Efficient Neighborhood Search,"
           Mathematical and Computer Modelling, vol. 24, no. 9, pp. 11-19, 1996.
 
+    Starting from a greedy orientation (heaviest edges first, each headed at a
+    member of least weighted indegree), the search alternates two phases until
+    neither improves: moving an edge away from a vertex of maximum weighted
+    indegree (NR), and swapping the heads of two edges between a pair of
+    vertices (NI). Weighted indegrees are updated as edges move, edges are
+    indexed by head, and vertices to examine are kept in heaps ordered by
+    weighted indegree, so that only vertices near an accepted move are examined
+    again. No move increases the maximum weighted indegree, so if the search is
+    stopped early by a time or iteration limit, the orientation returned is the
+    best found.
+
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
+    @param initial: Orientation of the hypergraph to start from (optional).
+    @type initial: L{Hypergraph}
+    @param time_limit: Maximum time in seconds from the call to the end of the
+                       search (optional); building the returned orientation
+                       takes additional time, linear in the size of the
+                       hypergraph.
+    @type time_limit: C{float}
+    @param max_iterations: Maximum number of accepted moves (optional).
+    @type max_iterations: C{int}
     @return: Approximation of minimum MIO of the hypergraph.
     @rtype: L{Hypergraph}
+    @raise ValueError: The initial orientation is not an orientation of H.
     """
-    class Break(Exception): pass
-    L = Hypergraph(vertices=H.vertices, directed=True)
-    # starting point
-    for edge in H.edges:
-        L.add_edge(Edge(edge, head=min([(L.indegree(v), v) for v in edge])[1]),
-            weight=H.weights[edge])
-    # search NR
-    accepted = True
-    while accepted:
-        accepted = False
-        vmax = max([(L.indegree(v), v) for v in L.vertices])[1]
-        Emax = set([edge for edge in L.edges if edge.head is vmax])
-        R = set([(v, emax) for v in L.vertices - set([vmax]) \
-            for emax in Emax if v in emax])
-        while R:
-            vertex, edge = R.pop()
-            if L.indegree(vertex) + 1e-4 < L.indegree(vmax) \
-                - H.weights[Edge(edge)]:
-                L.remove_edge(edge)
-                L.add_edge(Edge(edge, head=vertex),
-                    weight=H.weights[Edge(edge)])
-                accepted = True
+    start = time()
+
+    def move(e, v):
+        u = heads[e]
+        if u is not None:
+            headed[u].discard(e)
+            loads[u] -= weights[e]
+        heads[e] = v
+        headed[v].add(e)
+        loads[v] += weights[e]
+
+    def exhausted():
+        return (max_iterations is not None and moves[0] >= max_iterations) \
+            or (time_limit is not None and time() - start >= time_limit)
+
+    def search_nr():
+        Q = [(-loads[v], v) for v in xrange(n)]
+        heapify(Q)
+        accepted = 0
+        while Q and not exhausted():
+            load, u = heappop(Q)
+            if -load != loads[u]:
+                continue
+            best = None
+            for e in headed[u]:
+                for v in members[e]:
+                    value = loads[v] + weights[e]
+                    if v != u and value + 1e-4 < loads[u] \
+                        and (best is None or value < best[0]):
+                        best = (value, e, v)
+            if best is None:
                 break
-    # search NI
-    accepted = True
-    while accepted:
-        accepted = False
-        V = [vertex for vertex in L.vertices]
-        V.sort(cmp=lambda a, b: -1 if L.indegree(a) < L.indegree(b) else \
-            (1 if L.indegree(a) > L.indegree(b) else 0))
+            value, e, v = best
+            move(e, v)
+            moves[0] += 1
+            accepted += 1
+            heappush(Q, (-loads[u], u))
+            heappush(Q, (-loads[v], v))
+        return accepted
+
+    def search_ni():
+        Q = [(-loads[v], v) for v in xrange(n)]
+        heapify(Q)
+        queued = set(xrange(n))
+        accepted = 0
+        while Q and not exhausted():
+            v1 = heappop(Q)[1]
+            if not v1 in queued:
+                continue
+            queued.discard(v1)
+            best = None
+            for e1 in headed[v1]:
+                for v2 in members[e1]:
+                    if v2 == v1 or loads[v2] > loads[v1]:
+                        continue
+                    for e2 in headed[v2]:
+                        if not v1 in member_sets[e2]:
+                            continue
+                        value = max(loads[v1] - weights[e1] + weights[e2],
+                            loads[v2] - weights[e2] + weights[e1])
+                        if value + 1e-4 < loads[v1] \
+                            and (best is None or value < best[0]):
+                            best = (value, e1, v2, e2)
+            if best is None:
+                continue
+            value, e1, v2, e2 = best
+            move(e1, v2)
+            move(e2, v1)
+            moves[0] += 1
+            accepted += 1
+            # the moves may have enabled swaps for vertices sharing an edge
+            # headed at v1 or v2
+            for v in set([w for e in headed[v1] | headed[v2] \
+                for w in members[e]]):
+                if not v in queued:
+                    queued.add(v)
+                    heappush(Q, (-loads[v], v))
+        return accepted
+
+    moves = [0]
+    index = H.vertex_index
+    E, members = _members(H)
+    member_sets = [frozenset(ids) for ids in members]
+    weights = [H.weights[edge] for edge in E]
+    n = len(index)
+    loads = [0.0] * n
+    headed = [set() for v in xrange(n)]
+    heads = [None] * len(E)
+    # starting point
+    if initial is None:
+        for e in sorted(xrange(len(E)), key=weights.__getitem__, reverse=True):
+            move(e, min([(loads[v], v) for v in members[e]])[1])
+    else:
+        ids = dict((edge, e) for e, edge in enumerate(E))
         try:
-            for v1 in reversed(V):
-                for v2 in V:
-                    if v2 is v1:
-                        break
-                    for e1 in [edge for edge in L.edges \
-                    if edge.head is v1 and v2 in edge]:
-                        for e2 in [edge for edge in L.edges \
-                        if edge.head is v2 and v1 in edge]:
-                            if max(L.indegree(v1) - H.weights[Edge(e1)] \
-                                + H.weights[Edge(e2)], L.indegree(v2) \
-                                - H.weights[Edge(e2)] + H.weights[Edge(e1)]) \
-                                + 1e-4 < max(L.indegree(v1), L.indegree(v2)):
-                                L.remove_edge(e1)
-                                L.remove_edge(e2)
-                                L.add_edge(Edge(e1, head=v2),
-                                    weight=H.weights[Edge(e1)])
-                                L.add_edge(Edge(e2, head=v1),
-                                    weight=H.weights[Edge(e2)])
-                                accepted = True
-                                raise Break
-        except Break:
-            pass
-    return L
+            for edge in edge_order(initial):
+                e = ids[H.edge(edge)]
+                assert heads[e] is None
+                move(e, index[edge.head])
+            assert not None in heads
+        except (KeyError, AssertionError):
+            raise ValueError('initial orientation does not match hypergraph')
+    # search NR and NI until neither improves
+    while search_nr() + search_ni() and not exhausted():
+        pass
+    return _orientation(index, members, heads, weights)
+
+
+OrientationStats = namedtuple('OrientationStats', ['start', 'seed', 'initial',
+    'maximum', 'time'])
+
+
+def best_orientation(H, starts=4, workers=1, seed=None, time_limit=None,
+                     max_iterations=None):
+    """\
+    Search for a minimum maximum weighted indegree orientation of a hypergraph
+    from several random starting orientations, using
+    L{minimum_maximum_weighted_indegree_orientation}, and return the best. The
+    searches are independent and may run in parallel worker processes. Each
+    start draws its own seed from a generator seeded with the given seed, so
+    that the result and statistics (apart from times) depend only on the seed
+    and not on the number of workers.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @param starts: The number of starting orientations.
+    @type starts: C{int}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    @param seed: Seed for the starting orientations (optional).
+    @type seed: C{int}
+    @param time_limit: Maximum search time in seconds for each start
+                       (optional).
+    @type time_limit: C{float}
+    @param max_iterations: Maximum number of accepted moves for each start
+                           (optional).
+    @type max_iterations: C{int}
+    @return: The orientation with the least maximum weighted indegree (the
+             first such start on a tie), and the statistics of each start in
+             order: start number, seed, maximum weighted indegree of the
+             starting and final orientations, and search time in seconds.
+    @rtype: L{Hypergraph}, C{list} of L{OrientationStats}
+    @raise ValueError: The number of starts is not positive.
+    """
+    try:
+        assert starts > 0
+    except AssertionError:
+        raise ValueError('at least one start is required')
+    rng = Random(seed)
+    seeds = [rng.getrandbits(32) for k in xrange(starts)]
+    settings = (H, time_limit, max_iterations)
+    if workers > 1:
+        pool = Pool(min(workers, starts), _start_initializer, settings)
+        try:
+            results = list(pool.imap_unordered(_start_worker, enumerate(seeds)))
+        finally:
+            pool.terminate()
+    else:
+        results = [_start(settings, k, s) for k, s in enumerate(seeds)]
+    results.sort(key=lambda result: result[1].start)
+    best = min(results, key=lambda result: result[1].maximum)
+    return best[0], [result[1] for result in results]
+
+
+_start_settings = None
+
+
+def _start_initializer(*settings):
+    """\
+    Set the hypergraph and search limits of a multi-start worker process.
+    """
+    global _start_settings
+    _start_settings = settings
+
+
+def _start_worker(start):
+    """\
+    Run one start of L{best_orientation} in a multi-start worker process.
+    """
+    return _start(_start_settings, *start)
+
+
+def _start(settings, start, seed):
+    """\
+    Run one start of L{best_orientation}.
+
+    @param settings: The hypergraph, time limit, and iteration limit.
+    @type settings: C{tuple}
+    @param start: The start number.
+    @type start: C{int}
+    @param seed: The seed of the starting orientation.
+    @type seed: C{int}
+    @return: The orientation found and its statistics.
+    @rtype: L{Hypergraph}, L{OrientationStats}
+    """
+    H, time_limit, max_iterations = settings
+    begin = time()
+    initial = random_orientation(H, Random(seed))
+    L = minimum_maximum_weighted_indegree_orientation(H, initial, time_limit,
+        max_iterations)
+    return L, OrientationStats(start, seed, _maximum_indegree(initial),
+        _maximum_indegree(L), time() - begin)
+
+
+def _maximum_indegree(L):
+    """\
+    Return the maximum weighted indegree of an orientation.
+
+    @param L: The orientation.
+    @type L: L{Hypergraph}
+    @rtype: C{float}
+    """
+    return max([L.indegree(v) for v in L.vertices] or [0.0])
@@ -7,17 +7,24 @@ Hypergraph - path algorithms.
 @license: LGPL-3
 """
 
-from copy import deepcopy
+from collections import OrderedDict, deque, namedtuple
+from heapq import heappush, heappop
+from itertools import count
+from multiprocessing import Pool
 
-from .core import Graph, Edge
-from .search import breadth_first_search
-from .connectivity import connected
+import numpy
 
+from .core import Graph
+from .matrix import vertex_order
 
-def dijkstra(G, start):
+
+def dijkstra(G, start, end=None):
     """\
     Dijkstra's algorithm for finding the shortest paths from the start vertex to
-    all other vertices in graphs with nonnegative weights.
+    all other vertices in graphs with nonnegative weights. Uses a binary heap
+    with lazy deletion. If an end vertex is given, the search stops as soon as
+    the end vertex is settled, and only the distances of settled vertices are
+    final.
 
         - E. W. Dijkstra, "A Note on Two Problems in Connexion with Graphs,"
           Numerische Mathematik, vol. 1, pp. 269-271, 1959.
@@ -26,8 +33,10 @@ def dijkstra(G, start):
     @type G: L{Graph}
     @param start: The start vertex.
     @type start: C{object}
-    @return: The "previous" array of Dijkstra's algoritm.
-    @rtype: C{dict}
+    @param end: The end vertex (optional).
+    @type end: C{object}
+    @return: The "previous" array of Dijkstra's algoritm and the distances.
+    @rtype: C{dict}, C{dict}
     @raise ValueError: Graph is not 2-uniform or has negative edge weights.
     """
     try:
@@ -38,27 +47,51 @@ def dijkstra(G, start):
                           'with nonnegative edge weights'))
     dist = dict.fromkeys(G.vertices, float('inf'))
     prev = dict.fromkeys(G.vertices, None)
-    Q = set(G.vertices)
     dist[start] = 0.0
+    settled = set()
+    tiebreak = count()
+    Q = [(0.0, next(tiebreak), start)]
     while Q:
-        u = None
-        for vertex in Q:
-            if not u or dist[vertex] < dist[u]:
-                u = vertex
-        Q.remove(u)
-        for vertex in G.neighbors(u):
-            alt = dist[u] + G.weights[Edge([u, vertex],
-                head=(vertex if G.directed else None))]
-            if alt < dist[vertex]:
-                dist[vertex] = alt
-                prev[vertex] = u
-    return prev
+        d, i, u = heappop(Q)
+        if u in settled:
+            continue
+        settled.add(u)
+        if u == end:
+            break
+        for edge in G.incident(u, forward=False):
+            for vertex in ([edge.head] if G.directed else edge):
+                if vertex in settled:
+                    continue
+                alt = d + G.weights[edge]
+                if alt < dist[vertex]:
+                    dist[vertex] = alt
+                    prev[vertex] = u
+                    heappush(Q, (alt, next(tiebreak), vertex))
+    return prev, dist
+
+
+class NegativeCycleError(RuntimeError):
+    """\
+    Negative-weight cycle error. The cycle attribute holds the edges of a
+    negative-weight cycle, in order.
+    """
+    def __init__(self, cycle):
+        """\
+        Constructor.
+
+        @param cycle: The edges of the cycle.
+        @type cycle: C{list} of L{Edge<hypergraph.core.Edge>}
+        """
+        RuntimeError.__init__(self, 'graph contains a negative-weight cycle')
+        self.cycle = cycle
 
 
 def bellman_ford(G, start):
     """\
     Bellman-Ford algorithm for finding the shortest paths from the start vertex
-    to all other vertices in directed graphs.
+    to all other vertices in directed graphs. Uses a work queue (the "shortest
+    path faster algorithm" variant), relaxing only the edges out of vertices
+    whose distance has changed and stopping when no distance changes.
 
         - R. Bellman, "On a Routing Problem," Quarterly of Applied Mathematics,
           vol. 16, no. 1, pp. 87-90, 1958.
@@ -70,10 +103,10 @@ def bellman_ford(G, start):
     @type G: L{Graph}
     @param start: The start vertex.
     @type start: C{object}
-    @return:
-    @rtype: C{dict}
+    @return: The "previous" array of the algorithm and the distances.
+    @rtype: C{dict}, C{dict}
     @raise ValueError: Graph is not 2-uniform or is not directed.
-    @raise RuntimeError: Graph contains a negative-weight cycle.
+    @raise NegativeCycleError: Graph contains a negative-weight cycle.
     """
     try:
         assert G.directed
@@ -83,20 +116,81 @@ def bellman_ford(G, start):
     dist = dict.fromkeys(G.vertices, float('inf'))
     prev = dict.fromkeys(G.vertices, None)
     dist[start] = 0.0
-    for i in range(1, len(G.vertices) - 1):
-        for edge in G.edges:
-            u, v = edge.tail.pop(), edge.head
-            if dist[u] + G.weights[edge] < dist[v]:
-                dist[v] = dist[u] + G.weights[edge]
+    _relax_queue(G, dist, prev, [start])
+    return prev, dist
+
+
+def _relax_queue(G, dist, prev, sources):
+    """\
+    Relax edges out of the source vertices, and then out of every vertex whose
+    distance decreases, until no distance decreases. A negative-weight cycle is
+    detected when some shortest path estimate reaches as many edges as there are
+    vertices.
+
+    @param G: The directed graph.
+    @type G: L{Graph}
+    @param dist: The initial distances (updated in place).
+    @type dist: C{dict}
+    @param prev: The initial "previous" array (updated in place).
+    @type prev: C{dict}
+    @param sources: The vertices whose outgoing edges are relaxed first.
+    @type sources: C{list}
+    @raise NegativeCycleError: Graph contains a negative-weight cycle.
+    """
+    n = len(G.vertices)
+    hops = dict.fromkeys(sources, 0)
+    via = {}
+    Q = deque(sources)
+    queued = set(sources)
+    while Q:
+        u = Q.popleft()
+        queued.remove(u)
+        for edge in G.incident(u, forward=False):
+            v = edge.head
+            alt = dist[u] + G.weights[edge]
+            if alt < dist[v]:
+                dist[v] = alt
                 prev[v] = u
-    for edge in G.edges:
-        u, v = edge.tail.pop(), edge.head
-        if dist[u] + G.weights[edge] < dist[v]:
-            raise RuntimeError('graph contains a negative-weight cycle')
-    return prev
+                via[v] = edge
+                hops[v] = hops[u] + 1
+                if hops[v] >= n:
+                    cycle = _predecessor_cycle(prev, via, v, n)
+                    if cycle:
+                        raise NegativeCycleError(cycle)
+                if not v in queued:
+                    Q.append(v)
+                    queued.add(v)
+
+
+def _predecessor_cycle(prev, via, v, n):
+    """\
+    Find a cycle by following "previous" links back from a vertex.
+
+    @param prev: The "previous" array.
+    @type prev: C{dict}
+    @param via: The edge into each vertex from its previous vertex.
+    @type via: C{dict}
+    @param v: The vertex.
+    @type v: C{object}
+    @param n: The number of vertices.
+    @type n: C{int}
+    @return: The edges of the cycle in order, or None if there is none.
+    @rtype: C{list} of L{Edge<hypergraph.core.Edge>}
+    """
+    for i in range(n):
+        v = prev[v]
+        if v is None:
+            return None
+    cycle = [via[v]]
+    u = prev[v]
+    while u != v:
+        cycle.append(via[u])
+        u = prev[u]
+    cycle.reverse()
+    return cycle
 
 
-def shortest_path(G, start, end):
+def shortest_path(G, start, end, cache=None):
     """\
     Find the shortest path from the start vertex to the end vertex. Attempt to
     use Dijkstra's algorithm first, then Bellman-Ford algorithm.
@@ -105,23 +199,347 @@ def shortest_path(G, start, end):
     @type start: C{object}
     @param end: The end vertex.
     @type end: C{object}
-    @return: Shortest path vertex list and total distance.
+    @param cache: Cache of single-source results to use (optional).
+    @type cache: L{ShortestPathCache}
+    @return: Shortest path vertex list and total distance (an empty list and
+             infinite distance if the end vertex is unreachable).
     @rtype: C{list}, C{float}
     """
+    prev, dist = _single_source(G, start, end, cache)
+    return _trace_path(prev, dist, start, end)
+
+
+def _single_source(G, start, end=None, cache=None):
+    """\
+    Find the shortest paths from the start vertex using Dijkstra's algorithm if
+    possible, otherwise Bellman-Ford algorithm. If a cache is given, results
+    for all vertices are taken from or stored in it.
+
+    @param G: The graph.
+    @type G: L{Graph}
+    @param start: The start vertex.
+    @type start: C{object}
+    @param end: The end vertex, at which the search may stop (optional).
+    @type end: C{object}
+    @param cache: Cache of single-source results to use (optional).
+    @type cache: L{ShortestPathCache}
+    @return: The "previous" array and the distances.
+    @rtype: C{dict}, C{dict}
+    """
     try:
-        prev = dijkstra(G, start)
+        if cache is not None:
+            return cache.get(G, start, dijkstra)
+        return dijkstra(G, start, end)
     except ValueError:
-        prev = bellman_ford(G, start)
-    path = []
-    u = end
-    dist = 0.0
-    while u in prev.keys():
-        path.insert(0, u)
-        if prev[u]:
-            dist += G.weights[Edge([prev[u], u],
-                head=(u if G.directed else None))]
-        u = prev[u]
-    return path, dist
+        if cache is not None:
+            return cache.get(G, start, bellman_ford)
+        return bellman_ford(G, start)
+
+
+def _trace_path(prev, dist, start, end):
+    """\
+    Trace a shortest path back from the end vertex through a "previous" array.
+
+    @param prev: The "previous" array.
+    @type prev: C{dict}
+    @param dist: The distances from the start vertex.
+    @type dist: C{dict}
+    @param start: The start vertex.
+    @type start: C{object}
+    @param end: The end vertex.
+    @type end: C{object}
+    @return: Shortest path vertex list and total distance.
+    @rtype: C{list}, C{float}
+    """
+    if dist[end] == float('inf'):
+        return [], dist[end]
+    path = [end]
+    while path[-1] != start:
+        path.append(prev[path[-1]])
+    path.reverse()
+    return path, dist[end]
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class ShortestPathCache(object):
+    """\
+    Bounded least-recently-used cache of single-source shortest path results,
+    keyed by graph, graph version, start vertex, and algorithm. Since the
+    version of a graph changes whenever it is modified, stale results are never
+    returned (they are eventually evicted). Cached results must not be modified.
+    """
+    def __init__(self, maxsize=128):
+        """\
+        Constructor.
+
+        @param maxsize: The maximum number of cached results (0 caches
+                        nothing, None is unbounded).
+        @type maxsize: C{int}
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def __len__(self):
+        """\
+        Number of cached results.
+
+        @rtype: C{int}
+        """
+        return len(self._results)
+
+    def get(self, G, start, algorithm=dijkstra):
+        """\
+        Return the result of a single-source shortest path algorithm, running
+        it only if the result is not cached.
+
+        @param G: The graph.
+        @type G: L{Graph}
+        @param start: The start vertex.
+        @type start: C{object}
+        @param algorithm: The algorithm (L{dijkstra} or L{bellman_ford}).
+        @type algorithm: C{function}
+        @return: The "previous" array and the distances.
+        @rtype: C{dict}, C{dict}
+        """
+        key = (id(G), G.version, start, algorithm.__name__)
+        try:
+            result = self._results.pop(key)
+            self.hits += 1
+        except KeyError:
+            result = algorithm(G, start)
+            self.misses += 1
+            if self.maxsize == 0:
+                return result
+            if self.maxsize is not None and self._results \
+                and len(self._results) >= self.maxsize:
+                self._results.popitem(last=False)
+        self._results[key] = result
+        return result
+
+    def info(self):
+        """\
+        Return the hit and miss statistics of this cache.
+
+        @return: Hits, misses, maximum size, and current size.
+        @rtype: L{CacheInfo}
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        """\
+        Remove all cached results and reset the statistics.
+        """
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def shortest_paths_batch(G, pairs, workers=1, ordered=True, cache=None):
+    """\
+    Find the shortest paths for a batch of (start, end) vertex pairs, as in
+    L{shortest_path}. Queries are grouped by start vertex, so that each
+    single-source search runs once. With more than one worker, the start
+    vertices are distributed over a process pool, in which each worker process
+    holds one read-only copy of the graph.
+
+    @param G: The graph.
+    @type G: L{Graph}
+    @param pairs: The (start, end) vertex pairs.
+    @type pairs: C{list} of C{tuple}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    @param ordered: If true, return the results in the order of the pairs;
+                    otherwise, yield them as each start vertex is finished.
+    @type ordered: C{bool}
+    @param cache: Cache of single-source results to use, with one worker
+                  (optional).
+    @type cache: L{ShortestPathCache}
+    @return: Shortest path vertex list and total distance for each pair (if
+             unordered, each paired with its (start, end) pair).
+    @rtype: C{list} of C{tuple}
+    """
+    pairs = list(pairs)
+    groups = {}
+    for start, end in pairs:
+        groups.setdefault(start, []).append(end)
+    if ordered:
+        found = dict(_shortest_paths_batch(G, groups, workers, cache))
+        return [found[pair] for pair in pairs]
+    return _shortest_paths_batch(G, groups, workers, cache)
+
+
+def _shortest_paths_batch(G, groups, workers, cache):
+    """\
+    Generate the shortest paths for groups of end vertices by start vertex,
+    paired with their (start, end) pairs, as each start vertex is finished.
+
+    @param G: The graph.
+    @type G: L{Graph}
+    @param groups: The end vertices of each start vertex.
+    @type groups: C{dict}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    @param cache: Cache of single-source results to use, with one worker.
+    @type cache: L{ShortestPathCache}
+    """
+    if workers > 1:
+        pool = Pool(workers, _batch_initializer, (G,))
+        try:
+            for results in pool.imap_unordered(_batch_worker, groups.items()):
+                for result in results:
+                    yield result
+        finally:
+            pool.terminate()
+    else:
+        for start, ends in groups.items():
+            for result in _single_source_paths(G, start, ends, cache):
+                yield result
+
+
+_batch_graph = None
+
+
+def _batch_initializer(G):
+    """\
+    Set the graph of a batch worker process.
+    """
+    global _batch_graph
+    _batch_graph = G
+
+
+def _batch_worker(group):
+    """\
+    Find the shortest paths for a group of end vertices by start vertex in a
+    batch worker process.
+    """
+    return list(_single_source_paths(_batch_graph, *group))
+
+
+def _single_source_paths(G, start, ends, cache=None):
+    """\
+    Generate the shortest paths from a start vertex to each of a list of end
+    vertices, paired with their (start, end) pairs.
+
+    @param G: The graph.
+    @type G: L{Graph}
+    @param start: The start vertex.
+    @type start: C{object}
+    @param ends: The end vertices.
+    @type ends: C{list}
+    @param cache: Cache of single-source results to use (optional).
+    @type cache: L{ShortestPathCache}
+    """
+    prev, dist = _single_source(G, start,
+        ends[0] if len(ends) == 1 else None, cache)
+    for end in ends:
+        yield (start, end), _trace_path(prev, dist, start, end)
+
+
+def shortest_hypertree(H, start, weighting='additive'):
+    """\
+    Gallo's SBT procedure for finding shortest B-hyperpaths from the start
+    vertex to all other vertices in directed hypergraphs with nonnegative
+    weights. An edge may be traversed once every vertex in its tail has been
+    reached; the distance to its head through it is its weight plus either the
+    sum (additive weighting) or the maximum (max weighting) of the distances to
+    its tail vertices. Each edge is examined once per tail vertex, so the
+    running time is linear in the total size of the edges, plus the heap cost.
+
+        - G. Gallo, G. Longo, S. Pallottino, and S. Nguyen, "Directed
+          Hypergraphs and Applications," Discrete Applied Mathematics, vol. 42,
+          no. 2-3, pp. 177-201, 1993.
+
+    @param H: The directed hypergraph.
+    @type H: L{Hypergraph}
+    @param start: The start vertex.
+    @type start: C{object}
+    @param weighting: The weighting function, 'additive' or 'max'.
+    @type weighting: C{str}
+    @return: The edge through which each vertex is reached (None for the start
+             and unreachable vertices) and the distances.
+    @rtype: C{dict}, C{dict}
+    @raise ValueError: Hypergraph is not directed, has negative edge weights,
+                       or the weighting function is unknown.
+    """
+    pred, dist, _ = _shortest_hypertree(H, start, weighting)
+    return pred, dist
+
+
+def _shortest_hypertree(H, start, weighting):
+    """\
+    Run the SBT procedure of L{shortest_hypertree}, also returning the reached
+    vertices in the order in which they are settled. Every tail vertex of the
+    edge through which a vertex is reached is settled before that vertex.
+
+    @return: Predecessor edges, distances, and settled vertices in order.
+    @rtype: C{dict}, C{dict}, C{list}
+    """
+    try:
+        assert H.directed
+        assert all([weight >= 0 for weight in H.weights.values()])
+        combine = {'additive': sum, 'max': max}[weighting]
+    except AssertionError:
+        raise ValueError(('function can only be applied to directed '
+                          'hypergraphs with nonnegative edge weights'))
+    except KeyError:
+        raise ValueError('unknown weighting function %s' % weighting)
+    dist = dict.fromkeys(H.vertices, float('inf'))
+    pred = dict.fromkeys(H.vertices, None)
+    dist[start] = 0.0
+    reached = {}
+    settled = set()
+    order = []
+    tiebreak = count()
+    Q = [(0.0, next(tiebreak), start)]
+    while Q:
+        d, i, u = heappop(Q)
+        if u in settled:
+            continue
+        settled.add(u)
+        order.append(u)
+        for edge in H.incident(u, forward=False):
+            reached[edge] = reached.get(edge, 0) + 1
+            if reached[edge] < len(edge) - 1 or edge.head in settled:
+                continue
+            alt = H.weights[edge] + combine([dist[v] for v in edge.tail])
+            if alt < dist[edge.head]:
+                dist[edge.head] = alt
+                pred[edge.head] = edge
+                heappush(Q, (alt, next(tiebreak), edge.head))
+    return pred, dist, order
+
+
+def shortest_hyperpath(H, start, end, weighting='additive'):
+    """\
+    Find the shortest B-hyperpath from the start vertex to the end vertex of a
+    directed hypergraph, as in L{shortest_hypertree}.
+
+    @param H: The directed hypergraph.
+    @type H: L{Hypergraph}
+    @param start: The start vertex.
+    @type start: C{object}
+    @param end: The end vertex.
+    @type end: C{object}
+    @param weighting: The weighting function, 'additive' or 'max'.
+    @type weighting: C{str}
+    @return: Edges of the hyperpath in order of traversal, and total distance
+             (an empty list and infinite distance if the end vertex is not
+             B-connected to the start vertex).
+    @rtype: C{list} of L{Edge<hypergraph.core.Edge>}, C{float}
+    """
+    pred, dist, order = _shortest_hypertree(H, start, weighting)
+    edges = set()
+    stack = [end] if dist[end] < float('inf') else []
+    while stack:
+        edge = pred[stack.pop()]
+        if edge is not None and not edge in edges:
+            edges.add(edge)
+            stack.extend(edge.tail)
+    return [pred[v] for v in order if pred[v] in edges], dist[end]
 
 
 def floyd_warshall(G):
@@ -141,27 +559,211 @@ def floyd_warshall(G):
     @rtype: C{dict} of C{dict} of C{float}
     @raise ValueError: Graph is not 2-uniform.
     """
+    D, V = floyd_warshall_matrix(G)
+    return dict((u, dict(zip(V, D[i].tolist()))) for i, u in enumerate(V))
+
+
+def floyd_warshall_matrix(G, predecessors=False, block=256):
+    """\
+    Floyd-Warshall algorithm for finding the shortest path lengths between all
+    pairs of vertices in a graph, as a dense matrix. Each step of the outer loop
+    is a vectorized update, applied to blocks of rows at a time to bound the
+    size of temporary arrays.
+
+    The predecessor matrix holds, at row i and column j, the index of the vertex
+    preceding vertex j on a shortest path from vertex i (-1 if there is none).
+
+    @param G: The input graph.
+    @type G: L{Graph}
+    @param predecessors: If true, also return the predecessor matrix.
+    @type predecessors: C{bool}
+    @param block: The number of rows updated at a time.
+    @type block: C{int}
+    @return: Matrix of pairwise shortest path lengths, the list of vertices in
+             row/column order, and optionally the predecessor matrix.
+    @rtype: C{numpy.ndarray}, C{list}[, C{numpy.ndarray}]
+    @raise ValueError: Graph is not 2-uniform.
+    """
     try:
         assert G.uniform(2)
     except AssertionError:
         raise ValueError('function can only be applied to 2-uniform graphs')
-    path = {}
-    for u in G.vertices:
-        path[u] = {}
-        for v in G.vertices:
-            if u == v:
-                path[u][v] = 0.0
+    V = vertex_order(G)
+    index = G.vertex_index
+    n = len(V)
+    D = numpy.empty((n, n))
+    D.fill(float('inf'))
+    for edge in G.edges:
+        u, v = _endpoints(G, edge)
+        i, j = index[u], index[v]
+        D[i, j] = min(D[i, j], G.weights[edge])
+        if not G.directed:
+            D[j, i] = D[i, j]
+    numpy.fill_diagonal(D, 0.0)
+    if predecessors:
+        P = numpy.where(numpy.isfinite(D), numpy.arange(n)[:, None], -1)
+        numpy.fill_diagonal(P, -1)
+    for k in range(n):
+        for lo in range(0, n, block):
+            Dblock = D[lo:lo + block]
+            if not numpy.isfinite(Dblock[:, k]).any():
                 continue
-            try:
-                path[u][v] = G.weights[Edge([u, v],
-                    head=(v if G.directed else None))]
-            except KeyError:
-                path[u][v] = float('inf')
-    for w in G.vertices:
-        for u in G.vertices:
-            for v in G.vertices:
-                path[u][v] = min(path[u][v], path[u][w] + path[w][v])
-    return path
+            C = Dblock[:, k, None] + D[k]
+            if predecessors:
+                mask = C < Dblock
+                Dblock[mask] = C[mask]
+                Pblock = P[lo:lo + block]
+                Pblock[mask] = numpy.broadcast_to(P[k], C.shape)[mask]
+            else:
+                numpy.minimum(Dblock, C, out=Dblock)
+    if predecessors:
+        return D, V, P
+    return D, V
+
+
+def johnson(G, workers=1):
+    """\
+    Johnson's algorithm for finding the shortest path lengths between all pairs
+    of vertices in a sparse directed graph which may have negative weights. One
+    pass of (queue-based) Bellman-Ford algorithm from a virtual source computes
+    vertex potentials, with which the edges are reweighted to be nonnegative;
+    then Dijkstra's algorithm runs from each vertex, optionally in a process
+    pool. Rows are generated one at a time, so that the result need not fit in
+    memory.
+
+        - D. B. Johnson, "Efficient Algorithms for Shortest Paths in Sparse
+          Networks," J. of the ACM, vol. 24, no. 1, pp. 1-13, 1977.
+
+    @param G: The directed graph.
+    @type G: L{Graph}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    @return: Generator of start vertices and their rows of shortest path
+             lengths, with columns in L{vertex_order}.
+    @rtype: C{generator} of C{tuple} of (C{object}, C{numpy.ndarray})
+    @raise ValueError: Graph is not 2-uniform or is not directed.
+    @raise NegativeCycleError: Graph contains a negative-weight cycle.
+    """
+    try:
+        assert G.directed
+        assert G.uniform(2)
+    except AssertionError:
+        raise ValueError('function can only be applied to 2-uniform digraphs')
+    V = vertex_order(G)
+    index = G.vertex_index
+    potential = dict.fromkeys(V, 0.0)
+    _relax_queue(G, potential, dict.fromkeys(V, None), list(V))
+    h = numpy.array([potential[v] for v in V])
+    adjacency = [[] for v in V]
+    for edge in G.edges:
+        u, v = _endpoints(G, edge)
+        i, j = index[u], index[v]
+        adjacency[i].append((j, max(G.weights[edge] + h[i] - h[j], 0.0)))
+    return _johnson_rows(V, adjacency, h, workers)
+
+
+def _johnson_rows(V, adjacency, h, workers):
+    """\
+    Generate the rows of shortest path lengths for L{johnson}.
+
+    @param V: The vertices in order.
+    @type V: C{list}
+    @param adjacency: Heads and reweighted weights of the edges out of each
+                      vertex.
+    @type adjacency: C{list} of C{list} of C{tuple}
+    @param h: The vertex potentials.
+    @type h: C{numpy.ndarray}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    """
+    if workers > 1:
+        pool = Pool(workers, _johnson_initializer, (adjacency, h))
+        try:
+            for i, row in enumerate(pool.imap(_johnson_worker, range(len(V)))):
+                yield V[i], row
+        finally:
+            pool.terminate()
+    else:
+        for i in range(len(V)):
+            yield V[i], _johnson_row(adjacency, h, i)
+
+
+_johnson_graph = None
+
+
+def _johnson_initializer(adjacency, h):
+    """\
+    Set the reweighted graph of a Johnson worker process.
+    """
+    global _johnson_graph
+    _johnson_graph = (adjacency, h)
+
+
+def _johnson_worker(i):
+    """\
+    Find a row of shortest path lengths in a Johnson worker process.
+    """
+    return _johnson_row(_johnson_graph[0], _johnson_graph[1], i)
+
+
+def _johnson_row(adjacency, h, i):
+    """\
+    Find the shortest path lengths from one vertex by Dijkstra's algorithm on
+    the reweighted graph, and undo the reweighting.
+
+    @param adjacency: Heads and reweighted weights of the edges out of each
+                      vertex.
+    @type adjacency: C{list} of C{list} of C{tuple}
+    @param h: The vertex potentials.
+    @type h: C{numpy.ndarray}
+    @param i: The index of the start vertex.
+    @type i: C{int}
+    @return: The shortest path lengths.
+    @rtype: C{numpy.ndarray}
+    """
+    dist = numpy.empty(len(adjacency))
+    dist.fill(float('inf'))
+    dist[i] = 0.0
+    settled = numpy.zeros(len(adjacency), dtype=bool)
+    Q = [(0.0, i)]
+    while Q:
+        d, u = heappop(Q)
+        if settled[u]:
+            continue
+        settled[u] = True
+        for v, weight in adjacency[u]:
+            if d + weight < dist[v]:
+                dist[v] = d + weight
+                heappush(Q, (d + weight, v))
+    return dist - h[i] + h
+
+
+def johnson_matrix(G, out=None, workers=1):
+    """\
+    Find the shortest path lengths between all pairs of vertices in a sparse
+    directed graph with L{johnson}, writing the rows into a matrix as they are
+    found. The matrix may be a C{numpy.memmap}, for results larger than memory.
+
+    @param G: The directed graph.
+    @type G: L{Graph}
+    @param out: Square output matrix (optional).
+    @type out: C{numpy.ndarray}
+    @param workers: The number of worker processes.
+    @type workers: C{int}
+    @return: Matrix of pairwise shortest path lengths, and the list of vertices
+             in row/column order.
+    @rtype: C{numpy.ndarray}, C{list}
+    @raise ValueError: Graph is not 2-uniform or is not directed.
+    @raise NegativeCycleError: Graph contains a negative-weight cycle.
+    """
+    V = vertex_order(G)
+    if out is None:
+        out = numpy.empty((len(V), len(V)))
+    for i, (u, row) in enumerate(johnson(G, workers=workers)):
+        out[i] = row
+    if hasattr(out, 'flush'):
+        out.flush()
+    return out, V
 
 
 def shortest_path_subgraph(G):
@@ -175,44 +777,82 @@ def shortest_path_subgraph(G):
     @return: The shortest path subgraph.
     @rtype: L{Graph}
     """
-    S = deepcopy(G)
-    path = floyd_warshall(S)
-    for edge in S.edges:
-        if S.weights[edge] > path[edge.tail.pop()][edge.head]:
-            S.remove_edge(edge)
+    D, V = floyd_warshall_matrix(G)
+    index = G.vertex_index
+    S = Graph(vertices=G.vertices, directed=G.directed)
+    for edge in G.edges:
+        u, v = _endpoints(G, edge)
+        if not G.weights[edge] > D[index[u], index[v]]:
+            S.add_edge(edge, weight=G.weights[edge])
     return S
 
 
+def _endpoints(G, edge):
+    """\
+    Return the endpoints of an edge of a 2-uniform graph, the head last if the
+    graph is directed.
+
+    @param G: The graph.
+    @type G: L{Graph}
+    @param edge: The edge.
+    @type edge: L{Edge<hypergraph.core.Edge>}
+    @return: The two endpoints.
+    @rtype: C{tuple}
+    """
+    if G.directed:
+        return edge.tail.pop(), edge.head
+    return tuple(edge)
+
+
 def minimum_spanning_tree(G):
     """\
-    Return the minimum spanning tree of a graph via Kruskal's algorithm.
+    Return the minimum spanning tree of a graph via Kruskal's algorithm, using
+    a disjoint-set forest with union by rank and path compression. If the graph
+    is disconnected, return a minimum spanning forest.
 
         - J. B. Kruskal, "On the Shortest Spanning Subtree of a Graph and the
           Traveling Salesman Problem," Proc. American Mathematical Soc., vol. 7,
           pp. 48-50, 1956.
 
+        - R. E. Tarjan, "Efficiency of a Good But Not Linear Set Union
+          Algorithm," J. of the ACM, vol. 22, no. 2, pp. 215-225, 1975.
+
     @param G: The input undirected graph.
     @type G: L{Graph}
-    @return: The shortest path subgraph.
+    @return: The minimum spanning tree (or forest).
     @rtype: L{Graph}
     @raise ValueError: Graph is not 2-uniform or is directed.
     """
+    def find(v):
+        root = v
+        while parent[root] != root:
+            root = parent[root]
+        while parent[v] != root:
+            parent[v], v = root, parent[v]
+        return root
+
     try:
         assert not G.directed
         assert G.uniform(2)
     except AssertionError:
         raise ValueError(('function can only be applied to 2-uniform'
                          'undirected graphs'))
-    ebw = sorted(G.edges, key=G.weights.__getitem__)
+    index = G.vertex_index
+    parent = range(len(index))
+    rank = [0] * len(index)
     MST = Graph(vertices=G.vertices)
-    while ebw and not connected(MST):
-        edge = ebw.pop(0)
-        u, v = tuple(edge)
-        path = False
-        for w in breadth_first_search(MST, u):
-            if w == v:
-                path = True
-                break
-        if not path:
-            MST.add_edge(edge, weight=G.weights[edge])
+    unions = 0
+    for edge in sorted(G.edges, key=G.weights.__getitem__):
+        if unions == len(index) - 1:
+            break
+        u, v = [find(index[w]) for w in edge]
+        if u == v:
+            continue
+        if rank[u] < rank[v]:
+            u, v = v, u
+        parent[v] = u
+        if rank[u] == rank[v]:
+            rank[u] += 1
+        MST.add_edge(edge, weight=G.weights[edge])
+        unions += 1
     return MST
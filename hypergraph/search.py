@@ -7,49 +7,104 @@ Hypergraph - search algorithms.
 @license: LGPL-3
 """
 
-def breadth_first_search(H, start):
+from collections import deque
+
+
+def breadth_first_search(H, start, parents=None, depths=None):
     """\
     Breadth-first search generator. Yields vertices as they are reached.
 
+    If given, the parents dictionary is filled with the vertex and edge through
+    which each vertex was reached (None for the start vertex), and the depths
+    dictionary with the number of edges between each vertex and the start.
+
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
     @param start: The start vertex.
     @type start: C{object}
+    @param parents: Parent vertex and edge map to fill (optional).
+    @type parents: C{dict}
+    @param depths: Hop depth map to fill (optional).
+    @type depths: C{dict}
     """
+    if parents is not None:
+        parents[start] = None
+    depth = {start: 0}
+    if depths is not None:
+        depths[start] = 0
     yield start
     marked = set([start])
-    Q = [start]
+    Q = deque([start])
     while Q:
-        v = Q.pop(0)
-        for edge in H.incident(v, forward=False):
-            for w in ([edge.head] if H.directed else edge):
-                if not w in marked:
-                    marked.add(w)
-                    Q.append(w)
-                    yield w
+        v = Q.popleft()
+        for edge, w in _successors(H, v):
+            if not w in marked:
+                marked.add(w)
+                Q.append(w)
+                depth[w] = depth[v] + 1
+                if parents is not None:
+                    parents[w] = (v, edge)
+                if depths is not None:
+                    depths[w] = depth[w]
+                yield w
 
 
-def depth_first_search(H, start, marked=None):
+def depth_first_search(H, start, marked=None, parents=None, depths=None):
     """\
-    Depth-first search generator. Yields vertices as they are reached, along
-    with the path over which each was reached (a list of tuples containing the
-    next edge in the path and the destination vertex).
+    Depth-first search generator. Yields vertices as they are reached. Uses an
+    explicit stack, so the search depth is not bounded by the recursion limit.
+
+    If given, the parents dictionary is filled with the vertex and edge through
+    which each vertex was reached (None for the start vertex), and the depths
+    dictionary with the depth of each vertex in the search tree.
 
     @param H: The input hypergraph.
     @type H: L{Hypergraph}
-    @param marked: The initial set of marked vertices (for internal use).
-    @type marked: C{set}
     @param start: The start vertex.
     @type start: C{object}
+    @param marked: The initial set of marked vertices (if given, the start
+                   vertex is not yielded).
+    @type marked: C{set}
+    @param parents: Parent vertex and edge map to fill (optional).
+    @type parents: C{dict}
+    @param depths: Hop depth map to fill (optional).
+    @type depths: C{dict}
     """
     if marked is None:
         yield start
         marked = set()
     marked.add(start)
-    for edge in H.incident(start, forward=False):
-        if not edge in marked:
-            for w in ([edge.head] if H.directed else edge):
-                if not w in marked:
-                    yield w
-                    for y in depth_first_search(H, w, marked=marked):
-                        yield y
+    if parents is not None:
+        parents[start] = None
+    if depths is not None:
+        depths[start] = 0
+    stack = [(start, _successors(H, start))]
+    while stack:
+        v, successors = stack[-1]
+        for edge, w in successors:
+            if not w in marked:
+                marked.add(w)
+                if parents is not None:
+                    parents[w] = (v, edge)
+                if depths is not None:
+                    depths[w] = len(stack)
+                yield w
+                stack.append((w, _successors(H, w)))
+                break
+        else:
+            stack.pop()
+
+
+def _successors(H, v):
+    """\
+    Generate the vertices reachable from a vertex over one edge, along with the
+    edge over which each is reached.
+
+    @param H: The input hypergraph.
+    @type H: L{Hypergraph}
+    @param v: The vertex.
+    @type v: C{object}
+    """
+    for edge in H.incident(v, forward=False):
+        for w in ([edge.head] if H.directed else edge):
+            yield edge, w
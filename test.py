@@ -9,10 +9,17 @@ Unit tests for hypergraph.
 @license: LGPL-3
 """
 
+import copy
+import os
+import pickle
+import struct
+import tempfile
 import unittest
+from StringIO import StringIO
 
 from hypergraph.core import *
 from hypergraph.connectivity import *
+from hypergraph.fileio import *
 from hypergraph.matrix import *
 from hypergraph.orientation import *
 from hypergraph.path import *
@@ -106,6 +113,171 @@ class TestCore(unittest.TestCase):
         self.assertEqual(self.D.indegree('I', weighted=False), 3)
         self.assertEqual(self.D.outdegree('I', weighted=False), 8)
 
+    def test_incidence_index(self):
+        self.D.remove_edge(Edge(['I', 'D'], 'I'))
+        self.assertEqual(self.D.indegree('I', weighted=False), 2)
+        self.assertEqual(self.D.outdegree('D', weighted=False), 8)
+        self.assertFalse(Edge(['I', 'D'], 'I') in self.D.incident('I'))
+        self.U.remove_vertex('J')
+        self.assertEqual(self.U.degree('D', weighted=False), 6)
+        self.assertFalse('J' in self.U.neighbors('D'))
+        self.U.add_edge(Edge(['D', 'J']))
+        self.assertEqual(self.U.incident('J'), set([Edge(['D', 'J'])]))
+
+    def test_version(self):
+        versions = [self.U.version]
+        self.U.add_vertex('K')
+        versions.append(self.U.version)
+        self.U.add_edge(Edge(['K', 'A']))
+        versions.append(self.U.version)
+        self.U.weights[Edge(['K', 'A'])] = 2.0
+        versions.append(self.U.version)
+        self.U.remove_edge(Edge(['K', 'A']))
+        versions.append(self.U.version)
+        self.U.remove_vertex('K')
+        versions.append(self.U.version)
+        self.assertEqual(len(set(versions)), 6)
+        self.assertNotEqual(self.U.version, self.D.version)
+        for weights in [copy.copy(self.U.weights), self.U.weights.copy()]:
+            self.assertEqual(type(weights), dict)
+            weights.clear()
+        self.assertEqual(self.U.version, versions[-1])
+
+    def test_freeze(self):
+        for H in [self.U, self.D]:
+            F = H.freeze()
+            self.assertEqual(F, H)
+            self.assertEqual(F.thaw(), H)
+            self.assertEqual(F.incident('I'), H.incident('I'))
+            self.assertEqual(F.incident('I', forward=False), H.incident('I', forward=False))
+            self.assertEqual(F.neighbors('I'), H.neighbors('I'))
+            self.assertEqual(F.adjacent('A', 'G'), H.adjacent('A', 'G'))
+            self.assertEqual(F.indegree('I', weighted=False), H.indegree('I', weighted=False))
+            self.assertAlmostEqual(F.outdegree('I'), H.outdegree('I'))
+        F = self.D.freeze()
+        self.assertEqual(F.weights[Edge(['I', 'D'], 'I')], 4.417088)
+        self.assertRaises(KeyError, F.weights.__getitem__, Edge(['I', 'D'], 'D'))
+
+    def test_edge(self):
+        edge = Edge(['I', 'D', 'E', 'B'], 'B')
+        self.assertEqual(pickle.loads(pickle.dumps(edge)).head, 'B')
+        self.assertNotEqual(edge, Edge(['I', 'D', 'E', 'B'], 'E'))
+        self.assertFalse(hasattr(edge, '__dict__'))
+        for H in [self.D, self.D.freeze()]:
+            self.assertTrue(H.edge(['D', 'E', 'I', 'B'], 'B') is H.edge(edge, 'B'))
+            self.assertEqual(H.weight(['D', 'E', 'I', 'B'], 'B'), 4.940382)
+            self.assertRaises(KeyError, H.weight, ['D', 'E', 'I', 'B'], 'E')
+        self.assertEqual(self.U.weight(['I', 'D']), 4.417088)
+        self.D.remove_edge(edge)
+        self.assertRaises(KeyError, self.D.edge, edge, 'B')
+        self.D.add_edge(Edge(['I', 'D', 'E', 'B'], 'B'), weight=2.0)
+        self.assertEqual(self.D.weight(edge, 'B'), 2.0)
+        stored = self.D.edge(edge, 'B')
+        self.D.add_edge(Edge(['I', 'D', 'E', 'B'], 'B'), weight=3.0)
+        self.assertTrue(self.D.edge(edge, 'B') is stored)
+        self.assertTrue(stored in self.D.weights)
+
+    def test_vertex_index(self):
+        index = self.U.vertex_index
+        self.assertEqual(index.labels, sorted(self.U.vertices))
+        self.U.remove_vertex('B')
+        self.U.add_vertex('K')
+        self.assertEqual(index.labels, ['A', 'J', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'K'])
+        self.assertEqual([index[v] for v in index.labels], range(10))
+        self.assertEqual(list(index.ids(['K', 'J'])), [9, 1])
+        self.assertEqual(self.U.freeze().labels, tuple(index.labels))
+        self.assertEqual(vertex_order(self.U), index.labels)
+
+    def test_bulk_constructors(self):
+        for H in [self.U, self.D]:
+            F = H.freeze()
+            heads = F.heads if H.directed else None
+            self.assertEqual(Hypergraph.from_arrays(F.edge_offsets,
+                F.edge_members, heads, F.edge_weights, F.labels,
+                H.directed), H)
+        H = Hypergraph.from_edge_list([(1, 2, 3), (3, 4)], weights=[2, 3],
+            directed=True)
+        self.assertEqual(H.edges, set([Edge([1, 2, 3], 3), Edge([3, 4], 4)]))
+        self.assertEqual(H.weights[Edge([3, 4], 4)], 3.0)
+        B = incidence_matrix(H)
+        self.assertEqual(Hypergraph.from_incidence(B, [2, 3], [1, 2, 3, 4],
+            directed=True), H)
+        self.assertRaises(ValueError, Graph.from_edge_list, [(1, 2, 3)])
+        self.assertRaises(ValueError, Graph.from_edge_list, [(1, 1), (1, 2)])
+        self.assertRaises(ValueError, Hypergraph.from_arrays, [0, 3, 5],
+            [0, 1, 2, 3, 3])
+        self.assertRaises(ValueError, Hypergraph.from_arrays, [0, 2], [0, 1],
+            [2], directed=True)
+        self.assertRaises(ValueError, FrozenHypergraph, [1, 2, 3], [0, 2],
+            [0, 0])
+        self.assertRaises(ValueError, FrozenHypergraph, [1, 2, 3], [0, 2],
+            [0, 1], [2], directed=True)
+        self.assertRaises(ValueError, FrozenHypergraph, [1, 2, 3], [0, 2, 4],
+            [0, 1, 1, 2], vertex_offsets=[0, 1, 3, 4],
+            vertex_edges=[0, 1, 0, 1])
+        self.assertRaises(TypeError, Hypergraph, edges=[Edge([1, 2])],
+            weights={Edge([1, 2]): 'heavy'})
+
+
+class TestConnectivity(unittest.TestCase):
+
+    def setUp(self):
+        self.U = Hypergraph(vertices=range(1, 10))
+        self.U.add_edge(Edge([1, 2, 3]))
+        self.U.add_edge(Edge([3, 4]))
+        self.U.add_edge(Edge([5, 6, 7]), weight=2.5)
+        self.U.add_edge(Edge([7]))
+
+    def test_connected(self):
+        self.assertFalse(connected(self.U))
+        self.U.add_edge(Edge([4, 5, 8, 9]))
+        self.assertTrue(connected(self.U))
+        self.assertTrue(connected(Hypergraph(vertices=[1])))
+
+    def test_connected_components(self):
+        components = connected_components(self.U)
+        self.assertEqual([len(V) for V, E in components], [4, 3, 1, 1])
+        self.assertEqual(components[1], (set([5, 6, 7]), set([Edge([5, 6, 7]), Edge([7])])))
+        L = largest_component(self.U)
+        self.assertEqual(L.vertices, set([1, 2, 3, 4]))
+        self.assertEqual(L.edges, set([Edge([1, 2, 3]), Edge([3, 4])]))
+
+    def test_edge_cut(self):
+        self.assertEqual(edge_cut(self.U, set([3])), set([Edge([1, 2, 3]), Edge([3, 4])]))
+        self.assertRaises(ValueError, edge_cut, self.U, set([10]))
+        cut = EdgeCut(self.U, set([1, 2]))
+        self.assertEqual(len(cut), 1)
+        cut.add(3)
+        self.assertEqual(cut.edges, set([Edge([3, 4])]))
+        cut.add(7)
+        cut.remove(1)
+        self.assertEqual(len(cut), 3)
+        self.assertEqual(cut.members, set([2, 3, 7]))
+        self.assertEqual(cut.size, 3)
+        self.assertEqual(sorted([cut.count(e) for e in cut.incident(3)]), [1, 2])
+        self.assertRaises(ValueError, cut.incident, 10)
+        self.assertEqual(list(cut.sizes([set([3]), set([1, 2, 3, 4]), set(), set([5, 7])])), [2, 0, 0, 1])
+
+    def test_isoperimetric_number(self):
+        self.assertEqual(isoperimetric_number(self.U), 0.0)
+        C = Graph(vertices=range(1, 7))
+        for i in range(1, 7):
+            C.add_edge(Edge([i, i % 6 + 1]))
+        self.assertAlmostEqual(isoperimetric_number(C), 2.0 / 3)
+        i, gap = approximate_isoperimetric_number(C)
+        self.assertAlmostEqual(i, 2.0 / 3)
+        self.assertTrue(0 < gap < i)
+        self.U.add_edge(Edge([4, 5, 8, 9]))
+        self.assertAlmostEqual(isoperimetric_number(self.U), 0.25)
+        P = Graph(vertices=range(2100))
+        for i in range(2099):
+            P.add_edge(Edge([i, i + 1]))
+        self.assertAlmostEqual(isoperimetric_number(P), 1.0 / 1050)
+        D = Hypergraph(vertices=[1, 2], directed=True)
+        D.add_edge(Edge([1, 2], head=2))
+        self.assertRaises(ValueError, isoperimetric_number, D)
+        self.assertRaises(ValueError, approximate_isoperimetric_number, D)
+
 
 class TestOrientation(unittest.TestCase):
 
@@ -136,6 +308,129 @@ class TestOrientation(unittest.TestCase):
     def test_mmio(self):
         L = minimum_maximum_indegree_orientation(self.U)
         self.assertEqual(max([L.indegree(v) for v in L.vertices]), 2)
+        self.assertEqual(set([Edge(edge) for edge in L.edges]), self.U.edges)
+        self.U.add_edge(Edge(['I', 'J']))
+        L = minimum_maximum_indegree_orientation(self.U)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 3)
+
+    def test_flow(self):
+        L, S = flow_minimum_maximum_indegree_orientation(self.U)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 2)
+        self.assertEqual(set([Edge(edge) for edge in L.edges]), self.U.edges)
+        self.assertEqual(indegree_lower_bound(self.U, S), 2)
+        self.U.add_edge(Edge(['I', 'J']))
+        L, S = flow_minimum_maximum_indegree_orientation(self.U)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 3)
+        self.assertEqual(indegree_lower_bound(self.U, S), 3)
+        K = Hypergraph(vertices=range(100))
+        for i in range(11):
+            for j in range(i + 1, 11):
+                K.add_edge(Edge([i, j]))
+        L, S = flow_minimum_maximum_indegree_orientation(K)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 5)
+        self.assertEqual(indegree_lower_bound(K, S), 5)
+        self.assertTrue(S <= set(range(11)))
+
+    def test_mwio(self):
+        H = Hypergraph.from_edge_list([('A', 'B'), ('A', 'B', 'C'), ('B', 'C'),
+            ('C', 'D'), ('A', 'D')], weights=[4.0, 3.0, 2.0, 2.0, 1.0])
+        L = minimum_maximum_weighted_indegree_orientation(H)
+        self.assertEqual(set([Edge(edge) for edge in L.edges]), H.edges)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 4.0)
+        initial = Hypergraph.from_edge_list([('B', 'A'), ('B', 'C', 'A'),
+            ('B', 'C'), ('D', 'C'), ('D', 'A')], weights=[4.0, 3.0, 2.0, 2.0,
+            1.0], directed=True)
+        L = minimum_maximum_weighted_indegree_orientation(H, initial=initial,
+            max_iterations=0)
+        self.assertEqual(L, initial)
+        L = minimum_maximum_weighted_indegree_orientation(H, initial=initial)
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]), 4.0)
+        initial.remove_edge(Edge(['A', 'D'], 'A'))
+        self.assertRaises(ValueError, minimum_maximum_weighted_indegree_orientation,
+            H, initial=initial)
+
+    def test_best(self):
+        L = random_orientation(self.U)
+        self.assertEqual(set([Edge(edge) for edge in L.edges]), self.U.edges)
+        self.assertEqual(sum([L.indegree(v) for v in L.vertices]), 20.0)
+        L, stats = best_orientation(self.U, starts=3, seed=7)
+        self.assertEqual([s.start for s in stats], [0, 1, 2])
+        self.assertEqual(max([L.indegree(v) for v in L.vertices]),
+            min([s.maximum for s in stats]))
+        M, parallel = best_orientation(self.U, starts=3, workers=2, seed=7)
+        self.assertEqual(M, L)
+        self.assertEqual([s[:4] for s in parallel], [s[:4] for s in stats])
+        self.assertRaises(ValueError, best_orientation, self.U, starts=0)
+
+
+class TestIO(unittest.TestCase):
+
+    def setUp(self):
+        self.hgr = '% hMETIS\n3 6 1\n2 1 2\n1 1 5 6\n4 2 3 4\n'
+
+    def test_hgr(self):
+        H = read_hgr(StringIO(self.hgr), chunksize=2)
+        self.assertEqual(H.vertices, set(range(1, 7)))
+        self.assertEqual(H.weights[Edge([1, 5, 6])], 1.0)
+        self.assertEqual(read_hgr(StringIO(self.hgr), frozen=True), H)
+        self.assertEqual(len(list(read_hgr_chunks(StringIO(self.hgr), 2))), 2)
+        f = StringIO()
+        write_hgr(H, f)
+        self.assertEqual(f.getvalue(), self.hgr.split('\n', 1)[1])
+        self.assertRaises(ValueError, read_hgr, StringIO('4 6\n1 2\n'))
+        self.assertRaises(ValueError, read_hgr, StringIO('2 3\n1 1 2\n2 3\n'))
+
+    def test_edge_list(self):
+        D = Hypergraph.from_edge_list([('a', 'b'), ('b', 'c', 'a')],
+            weights=[1.5, 2.0], directed=True)
+        f = StringIO()
+        write_edge_list(D, f, weighted=True, chunksize=1)
+        f.seek(0)
+        self.assertEqual(read_edge_list(f, weighted=True, directed=True), D)
+
+    def test_gzip(self):
+        fd, path = tempfile.mkstemp(suffix='.hgr.gz')
+        os.close(fd)
+        try:
+            H = read_hgr(StringIO(self.hgr))
+            write_hgr(H, path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(2), '\x1f\x8b')
+                f.seek(0)
+                self.assertEqual(read_hgr(f), H)
+            self.assertEqual(read_hgr(path), H)
+            with open(path, 'rb') as f:
+                self.assertEqual(read_hgr(StringIO(f.read())), H)
+        finally:
+            os.remove(path)
+
+    def test_binary(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for H in [read_hgr(StringIO(self.hgr)),
+                Hypergraph.from_edge_list([('a', 'b'), ('c', 'b')], directed=True)]:
+                write_binary(H, path)
+                F = read_binary(path)
+                self.assertEqual(F, H)
+                self.assertEqual(F.labels, tuple(H.vertex_index.labels))
+                self.assertFalse(F.edge_members.flags.writeable)
+                self.assertEqual(read_binary(path, mmap=False, validate=False), H)
+            for section, value in [(0, 1), (1, 9), (5, 1)]:
+                write_binary(H, path)
+                with open(path, 'r+b') as f:
+                    f.seek(48 + 16 * section)   # section offset in header
+                    f.seek(struct.unpack('<q', f.read(8))[0])
+                    f.write(struct.pack('<q', value))
+                self.assertRaises(ValueError, read_binary, path)
+            F = FrozenHypergraph(['a', 'a'], [0, 1], [0])
+            self.assertRaises(ValueError, F.degree, 'a')
+            H = Hypergraph.from_edge_list([(1, 'a'), ('a', (2, 3))])
+            write_binary(H, path)
+            self.assertRaises(ValueError, read_binary, path)
+            self.assertEqual(read_binary(path, allow_pickle=True), H)
+        finally:
+            os.remove(path)
 
 
 class TestMatrix(unittest.TestCase):
@@ -180,6 +475,14 @@ class TestMatrix(unittest.TestCase):
         self.assertTrue(numpy.all(degree_matrix(self.GU) == numpy.diag([2, 4, 3, 2, 4, 2, 3])))
         self.assertTrue(numpy.all(degree_matrix(self.GD) == numpy.diag([1, 1, 2, 1, 2, 2, 1])))
 
+    def test_sparse(self):
+        for H in [self.GU, self.GD, self.HU]:
+            for matrix in [degree_matrix, adjacency_matrix, incidence_matrix, laplacian_matrix]:
+                self.assertTrue(numpy.allclose(matrix(H), matrix(H, sparse=True).toarray()))
+        self.assertEqual(vertex_order(self.HU), ['A', 'B', 'C', 'D', 'E', 'F', 'G'])
+        self.assertEqual(edge_order(self.HU)[:3], [Edge(['A', 'B']), Edge(['A', 'E', 'F']), Edge(['B', 'C', 'D', 'G'])])
+        self.assertEqual(adjacency_matrix(self.HU, sparse=True)[1, 6], 2)
+
     def test_laplacian_eigenvalues(self):
         eLGU = laplacian_eigenvalues(laplacian_matrix(self.GU))
         eLHU = laplacian_eigenvalues(laplacian_matrix(self.HU))
@@ -196,6 +499,46 @@ class TestMatrix(unittest.TestCase):
         self.assertTrue(abs(laplacian_eigenvalues(laplacian_matrix(self.GU))[1]) < 1e-8)
         self.assertTrue(abs(laplacian_eigenvalues(laplacian_matrix(self.HU))[1]) < 1e-8)
 
+    def test_smallest_laplacian_eigenpairs(self):
+        for H in [self.GU, self.HU]:
+            L = laplacian_matrix(H, sparse=True)
+            eigenvalues = laplacian_eigenvalues(L)
+            for method in ['lanczos', 'lobpcg']:
+                w, X = smallest_laplacian_eigenpairs(L, 3, method=method)
+                self.assertTrue(numpy.allclose(w, eigenvalues[:3]))
+                self.assertTrue(numpy.allclose(L.dot(X), X * w))
+            self.assertAlmostEqual(algebraic_connectivity(H), eigenvalues[1])
+            x = fiedler_vector(H)
+            self.assertTrue(numpy.allclose(L.dot(x), eigenvalues[1] * x))
+        self.assertRaises(ValueError, smallest_laplacian_eigenpairs, L, 0)
+        self.assertRaises(ValueError, algebraic_connectivity, self.GD)
+
+    def test_smallest_laplacian_eigenpairs_sparse(self):
+        n = DENSE_LIMIT + 44
+        P = Graph(vertices=range(n))
+        S = Graph(vertices=range(n))
+        for i in range(n - 1):
+            P.add_edge(Edge([i, i + 1]))
+            S.add_edge(Edge([0, i + 1]))
+        L = laplacian_matrix(P, sparse=True)
+        eigenvalues = 2 - 2 * numpy.cos(numpy.pi * numpy.arange(3) / n)
+        w, X = smallest_laplacian_eigenpairs(L, 3)
+        self.assertTrue(numpy.allclose(w, eigenvalues, rtol=1e-8, atol=1e-12))
+        self.assertTrue(numpy.linalg.norm(L.dot(X) - X * w, axis=0).max() < 1e-12)
+        self.assertAlmostEqual(algebraic_connectivity(P) / eigenvalues[1], 1.0)
+        x = fiedler_vector(P)
+        y = numpy.cos(numpy.pi * (numpy.arange(n) + 0.5) / n)
+        self.assertTrue(numpy.allclose(abs(x), abs(y) / numpy.linalg.norm(y)))
+        self.assertRaises(ConvergenceError, smallest_laplacian_eigenpairs, L, 3, method='lobpcg', maxiter=20)
+        L = laplacian_matrix(S, sparse=True)
+        for method in ['lanczos', 'lobpcg']:
+            w, X = smallest_laplacian_eigenpairs(L, 3, method=method)
+            self.assertTrue(numpy.allclose(w, [0, 1, 1]))
+            self.assertTrue(numpy.linalg.norm(L.dot(X) - X * w, axis=0).max() < 1e-8)
+        P.add_edge(Edge([n, n + 1]))
+        w, X = smallest_laplacian_eigenpairs(laplacian_matrix(P, sparse=True), 3)
+        self.assertTrue(numpy.allclose(w, [0, 0, eigenvalues[1]], atol=1e-12))
+
 class TestPath(unittest.TestCase):
 
     def setUp(self):
@@ -213,11 +556,16 @@ class TestPath(unittest.TestCase):
 
     def test_dijkstra(self):
         exp = {1: None, 2: 1, 3: 2, 4: 3, 5: 2}
-        act = dijkstra(self.U, 1)
+        act, dist = dijkstra(self.U, 1)
         self.assertEqual(act, exp)
+        self.assertAlmostEqual(dist[4], 3.36)
         exp = {1: None, 2: 1, 3: 2, 4: 3, 5: 4}
-        act = dijkstra(self.D, 1)
+        act, dist = dijkstra(self.D, 1)
         self.assertEqual(act, exp)
+        self.assertEqual(dist[5], 4.76)
+        act, dist = dijkstra(self.D, 1, 3)
+        self.assertEqual(dist[3], 2.25)
+        self.assertEqual(dist[5], 5)
 
     def test_shortest_path(self):
         ep = [1, 2, 5]
@@ -234,14 +582,110 @@ class TestPath(unittest.TestCase):
         el = -2.6
         act = shortest_path(self.D, 1, 2)
         self.assertEqual(act, (ep, el))
+        self.D.add_vertex(6)
+        self.assertEqual(shortest_path(self.D, 1, 6), ([], float('inf')))
+
+    def test_bellman_ford(self):
+        prev, dist = bellman_ford(self.D, 1)
+        self.assertEqual(prev, {1: None, 2: 1, 3: 2, 4: 3, 5: 4})
+        self.assertAlmostEqual(dist[5], 4.76)
+        self.D.weights[Edge([5, 2], head=2)] = -4
+        try:
+            bellman_ford(self.D, 1)
+        except NegativeCycleError as error:
+            self.assertTrue(isinstance(error, RuntimeError))
+            self.assertEqual(set(error.cycle), set([Edge([2, 3], head=3), Edge([3, 4], head=4), Edge([4, 5], head=5), Edge([5, 2], head=2)]))
+            for e1, e2 in zip(error.cycle, error.cycle[1:] + error.cycle[:1]):
+                self.assertTrue(e1.head in e2.tail)
+        else:
+            self.fail('negative-weight cycle not detected')
+
+    def test_shortest_paths_batch(self):
+        pairs = [(1, 5), (2, 4), (1, 3), (3, 1), (1, 5)]
+        for G in [self.U, self.D]:
+            expected = [shortest_path(G, start, end) for start, end in pairs]
+            self.assertEqual(shortest_paths_batch(G, pairs), expected)
+            self.assertEqual(shortest_paths_batch(G, pairs, workers=2), expected)
+            results = list(shortest_paths_batch(G, pairs, workers=2, ordered=False))
+            self.assertEqual(sorted(results), sorted(zip(pairs, expected)))
+
+    def test_shortest_path_cache(self):
+        cache = ShortestPathCache(maxsize=2)
+        self.assertEqual(shortest_path(self.D, 1, 5, cache=cache), ([1, 2, 3, 4, 5], 4.76))
+        self.assertEqual(shortest_path(self.D, 1, 4, cache=cache)[0], [1, 2, 3, 4])
+        self.assertEqual(cache.info(), (1, 1, 2, 1))
+        shortest_path(self.D, 2, 5, cache=cache)
+        shortest_path(self.D, 3, 5, cache=cache)
+        shortest_path(self.D, 1, 5, cache=cache)
+        self.assertEqual(cache.info(), (1, 4, 2, 2))
+        version = self.D.version
+        self.D.weights[Edge([5, 2], head=2)] = -3
+        self.assertNotEqual(self.D.version, version)
+        self.D.add_edge(Edge([1, 4], head=4), weight=-1)
+        self.assertEqual(shortest_path(self.D, 1, 2, cache=cache), ([1, 4, 5, 2], -2.6))
+        self.assertEqual(cache.info().hits, 1)
+        for info in [(0, 4, 0, 0), (1, 3, None, 3)]:
+            cache = ShortestPathCache(maxsize=info[2])
+            for start in [1, 2, 3, 1]:
+                shortest_path(self.D, start, 5, cache=cache)
+            self.assertEqual(cache.info(), info)
+
+    def test_shortest_hyperpath(self):
+        H = Hypergraph(vertices=range(1, 7), directed=True)
+        H.add_edge(Edge([1, 2], head=2), weight=1)
+        H.add_edge(Edge([1, 3], head=3), weight=2)
+        H.add_edge(Edge([2, 3, 4], head=4), weight=1)
+        H.add_edge(Edge([1, 4], head=4), weight=5)
+        H.add_edge(Edge([4, 5, 6], head=6), weight=1)
+        H.add_edge(Edge([2, 5], head=2), weight=1)
+        pred, dist = shortest_hypertree(H, 1)
+        self.assertEqual(dist[4], 4)
+        self.assertEqual(dist[6], float('inf'))
+        self.assertEqual(shortest_hyperpath(H, 1, 4, weighting='max'), ([Edge([1, 2], head=2), Edge([1, 3], head=3), Edge([2, 3, 4], head=4)], 3))
+        self.assertEqual(shortest_hyperpath(H, 1, 6), ([], float('inf')))
+        Z = Hypergraph(vertices=range(1, 8), directed=True)
+        for i in range(1, 7):
+            Z.add_edge(Edge([8 - i, 7 - i], head=7 - i), weight=0)
+        self.assertEqual(shortest_hyperpath(Z, 7, 1), ([Edge([8 - i, 7 - i], head=7 - i) for i in range(1, 7)], 0))
+        self.assertRaises(ValueError, shortest_hypertree, self.U, 1)
 
     def test_floyd_warshall(self):
         self.assertEqual(floyd_warshall(self.U)[1][5], 3.25)
         self.assertEqual(floyd_warshall(self.D)[1][5], 4.76)
+        D, V, P = floyd_warshall_matrix(self.D, predecessors=True, block=2)
+        self.assertEqual(V, [1, 2, 3, 4, 5])
+        self.assertAlmostEqual(D[0][4], 4.76)
+        self.assertEqual(D[4][0], float('inf'))
+        self.assertEqual(list(P[0]), [-1, 0, 1, 2, 3])
+
+    def test_johnson(self):
+        self.D.weights[Edge([5, 2], head=2)] = -3
+        self.D.add_edge(Edge([1, 4], head=4), weight=-1)
+        F, V = floyd_warshall_matrix(self.D)
+        for workers in [1, 2]:
+            J, V = johnson_matrix(self.D, workers=workers)
+            self.assertTrue(numpy.allclose(J, F))
+        rows = dict(johnson(self.D))
+        self.assertAlmostEqual(rows[1][1], -2.6)
+        self.D.weights[Edge([5, 2], head=2)] = -5
+        self.assertRaises(NegativeCycleError, johnson_matrix, self.D)
+
+    def test_shortest_path_subgraph(self):
+        S = shortest_path_subgraph(self.U)
+        self.assertEqual(S.edges, self.U.edges - set([Edge([1, 5]), Edge([3, 5])]))
+        S = shortest_path_subgraph(self.D)
+        self.assertEqual(S.edges, self.D.edges - set([Edge([1, 5], head=5), Edge([3, 5], head=5)]))
 
     def test_minimum_spanning_tree(self):
         MST = minimum_spanning_tree(self.U)
         self.assertEqual(MST.edges, set([Edge([3, 4]), Edge([2, 3]), Edge([4, 5]), Edge([1, 2])]))
+        self.U.add_edge(Edge([6, 7]), weight=2)
+        self.U.add_edge(Edge([7, 8]), weight=1)
+        self.U.add_edge(Edge([6, 8]), weight=3)
+        MST = minimum_spanning_tree(self.U)
+        self.assertEqual(len(MST.edges), 6)
+        self.assertEqual(MST.vertices, self.U.vertices)
+        self.assertTrue(Edge([6, 8]) not in MST.edges)
 
 
 class TestSearch(unittest.TestCase):
@@ -274,6 +718,18 @@ class TestSearch(unittest.TestCase):
         self.assertEqual(D[0], 1)
         # TODO: not really sure how to test this due to set ordering
 
+    def test_search_tree(self):
+        for search in [breadth_first_search, depth_first_search]:
+            parents, depths = {}, {}
+            self.assertEqual(len(list(search(self.T, 1, parents=parents, depths=depths))), 12)
+            self.assertEqual(parents[1], None)
+            self.assertEqual(parents[11], (7, Edge([7, 11])))
+            self.assertEqual(depths[11], 3)
+        P = Graph(vertices=range(1, 5001))
+        for i in range(1, 5000):
+            P.add_edge(Edge([i, i + 1]))
+        self.assertEqual(list(depth_first_search(P, 1)), list(range(1, 5001)))
+
 
 if __name__ == '__main__':
     unittest.main()